@@ -0,0 +1,178 @@
+"""
+Benchmark the pydeps pipeline, stage by stage, on synthetic packages.
+
+Usage::
+
+    python -m benchmarks.bench_pipeline [-o results.json] [--scale 0.1]
+                                        [--repeat 3] [--only wide deep]
+                                        [--compare old-results.json]
+                                        [-- extra pydeps options]
+
+The packages are created by :mod:`benchmarks.generators` (in a temporary
+directory). For each package the wall and cpu time of these stages is
+recorded (the best of ``--repeat`` runs):
+
+- ``dummymodule``: creating the ``DummyModule``
+- ``run_script``: ``MyModuleFinder.run_script`` (finding all imports)
+- ``depgraph``: ``DepGraph.__init__`` (building and filtering the graph)
+- ``dep2dot``: converting the graph to dot source (includes ``text``)
+- ``text``: ``RenderBuffer.text``
+- ``total``: all of the above (and the glue between them)
+
+The results are written as JSON, and can be compared with the results
+from an earlier run (e.g. from the previous release) with ``--compare``.
+"""
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import pydeps
+from pydeps import cli, depgraph, dummymodule, py2depgraph, render_context
+from pydeps import pydeps as pydeps_main
+from pydeps.target import Target
+
+from .generators import GENERATORS
+
+#: (object, attribute, stage name) of the functions that are timed
+STAGES = [
+    (dummymodule.DummyModule, '__init__', 'dummymodule'),
+    (py2depgraph.MyModuleFinder, 'run_script', 'run_script'),
+    (depgraph.DepGraph, '__init__', 'depgraph'),
+    (pydeps_main, 'dep2dot', 'dep2dot'),
+    (render_context.RenderBuffer, 'text', 'text'),
+]
+
+
+class StageTimer(object):
+    """Wraps the functions in :data:`STAGES` to record their wall and cpu
+       time (while used as a context manager).
+    """
+    def __init__(self):
+        self.times = {}
+        self._originals = []
+
+    def _timed(self, fn, stage):
+        def timed(*args, **kwargs):
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                t = self.times.setdefault(stage, {'wall': 0.0, 'cpu': 0.0})
+                t['wall'] += time.perf_counter() - wall
+                t['cpu'] += time.process_time() - cpu
+        return timed
+
+    def __enter__(self):
+        for owner, attr, stage in STAGES:
+            fn = getattr(owner, attr)
+            self._originals.append((owner, attr, fn))
+            setattr(owner, attr, self._timed(fn, stage))
+        return self
+
+    def __exit__(self, *exc):
+        for owner, attr, fn in reversed(self._originals):
+            setattr(owner, attr, fn)
+        self._originals = []
+
+
+def run_pipeline(target, options=()):
+    """Run pydeps on ``target`` (without calling graphviz), and return
+       ``(stage times, number of modules in the graph)``.
+    """
+    trgt = Target(target)
+    kw = cli.parse_args([target, '--no-config', '--no-output', '--no-show'] + list(options))
+    kw.pop('fname')
+    with StageTimer() as timer:
+        wall, cpu = time.perf_counter(), time.process_time()
+        graph = py2depgraph.py2dep(trgt, **kw)
+        pydeps_main.depgraph_to_dotsrc(trgt, graph, **kw)
+        timer.times['total'] = {
+            'wall': time.perf_counter() - wall,
+            'cpu': time.process_time() - cpu,
+        }
+    return timer.times, len(graph.sources)
+
+
+def run_benchmark(name, scale=1.0, repeat=3, options=()):
+    generator, params = GENERATORS[name]
+    params = {k: max(2, int(v * scale)) for k, v in params.items()}
+    directory = tempfile.mkdtemp(prefix='pydeps-bench-')
+    try:
+        target = generator(directory, **params)
+        best = {}
+        for _ in range(repeat):
+            times, modules = run_pipeline(target, options)
+            for stage, t in times.items():
+                if stage not in best or t['wall'] < best[stage]['wall']:
+                    best[stage] = t
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'params': params,
+        'modules': modules,
+        'stages': {stage: {k: round(v, 4) for k, v in t.items()} for stage, t in best.items()},
+    }
+
+
+def compare(old, new, fp=sys.stderr):
+    """Print the wall time of each stage in ``new`` relative to ``old``.
+    """
+    fp.write("%-12s %-12s %10s %10s %8s\n" % ('benchmark', 'stage', 'old', 'new', 'ratio'))
+    for name, res in sorted(new['results'].items()):
+        oldres = old.get('results', {}).get(name)
+        if oldres is None:
+            continue
+        for stage, t in sorted(res['stages'].items()):
+            if stage not in oldres['stages']:
+                continue
+            before = oldres['stages'][stage]['wall']
+            after = t['wall']
+            fp.write("%-12s %-12s %9.3fs %9.3fs %7.2fx\n" % (
+                name, stage, before, after, after / before if before else float('inf')
+            ))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('-o', '--output', help="write the results (json) to this file (default: stdout)")
+    p.add_argument('--only', nargs='+', choices=sorted(GENERATORS), help="only run these benchmarks")
+    p.add_argument('--scale', type=float, default=1.0, help="scale the size of the generated packages")
+    p.add_argument('--repeat', type=int, default=3, help="report the best of this many runs")
+    p.add_argument('--compare', metavar='FILE', help="compare with the results in FILE")
+    p.add_argument('options', nargs='*', help="extra pydeps options (after --)")
+    args = p.parse_args(argv)
+    sys.setrecursionlimit(10000)  # like pydeps.pydeps.pydeps()
+
+    results = {}
+    for name in args.only or sorted(GENERATORS):
+        sys.stderr.write("running %s..\n" % name)
+        results[name] = run_benchmark(name, args.scale, args.repeat, args.options)
+
+    report = {
+        'pydeps': pydeps.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'options': args.options,
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    text = json.dumps(report, indent=4, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(json.load(fp), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark for the strongly connected components (import cycle) search.
+
+Usage::
+
+    python -m benchmarks.bench_scc [--nodes 100000] [--degree 4] [--repeat 3]
+
+The synthetic graph is a long chain (i -> i+1, which is as deep as the
+graph can get), plus ``degree - 1`` random edges per node, mostly to
+nodes further down the chain, with a few edges going back to create
+cycles.
+"""
+import argparse
+import random
+import sys
+import time
+
+from pydeps.depgraph import Graph, GraphNode, adjacency_arrays, strongly_connected_components
+
+
+def synthetic_edges(nodes, degree, seed=42):
+    rnd = random.Random(seed)
+    edges = [(i, i + 1) for i in range(nodes - 1)]
+    for u in range(nodes):
+        for _ in range(degree - 1):
+            if rnd.random() < 0.01:
+                v = rnd.randrange(max(0, u - 50), u + 1)    # back edge -> cycle
+            else:
+                v = rnd.randrange(u, min(nodes, u + 1000))
+            edges.append((u, v))
+    return edges
+
+
+def timeit(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+class _Source(object):
+    def __init__(self, name):
+        self.name = name
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('--nodes', type=int, default=100000)
+    p.add_argument('--degree', type=int, default=4)
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--kosaraju', action='store_true', help="also time Graph.kosaraju (GraphNode objects)")
+    args = p.parse_args(argv)
+
+    edges = synthetic_edges(args.nodes, args.degree, args.seed)
+    print("nodes: %d, edges: %d (python %s, recursion limit %d)" % (
+        args.nodes, len(edges), sys.version.split()[0], sys.getrecursionlimit()))
+
+    t, (offsets, targets) = timeit(lambda: adjacency_arrays(args.nodes, edges), args.repeat)
+    print("adjacency_arrays:              %8.3fs" % t)
+    t, scc = timeit(lambda: strongly_connected_components(offsets, targets), args.repeat)
+    cycles = [c for c in scc if len(c) > 1]
+    print("strongly_connected_components: %8.3fs  (%d components, %d cycles, largest %d)" % (
+        t, len(scc), len(cycles), max([len(c) for c in cycles] or [0])))
+
+    if args.kosaraju:
+        nodes = [GraphNode(_Source(str(i))) for i in range(args.nodes)]
+        graph = Graph(nodes, [(nodes[u], nodes[v]) for u, v in edges])
+        t, scc = timeit(graph.kosaraju, args.repeat)
+        print("Graph.kosaraju:                %8.3fs  (%d components)" % (t, len(scc)))
+
+
+if __name__ == '__main__':
+    main()
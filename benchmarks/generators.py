@@ -0,0 +1,121 @@
+"""
+Synthetic packages for the benchmarks.
+
+Each generator writes a tree of Python files below ``directory`` and
+returns the path of the target to run pydeps on (a package directory or
+a single file). The trees are deterministic for a given set of
+parameters (and ``seed``).
+"""
+import os
+import random
+
+
+def _write(fname, text=''):
+    dirname = os.path.dirname(fname)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(fname, 'w') as fp:
+        fp.write(text)
+
+
+def _imports(modules):
+    return ''.join('import %s\n' % m for m in modules)
+
+
+def wide(directory, modules=2000, imports=5, seed=42):
+    """One package with ``modules`` modules, where each module imports
+       ``imports`` random modules that come before it (so there are no
+       cycles).
+    """
+    rnd = random.Random(seed)
+    pkg = os.path.join(directory, 'widepkg')
+    _write(os.path.join(pkg, '__init__.py'))
+    for i in range(modules):
+        deps = rnd.sample(range(i), min(i, imports))
+        _write(
+            os.path.join(pkg, 'mod%d.py' % i),
+            _imports('widepkg.mod%d' % j for j in deps)
+        )
+    return pkg
+
+
+def deep(directory, depth=200, modules=2):
+    """Packages nested ``depth`` levels deep, each with ``modules`` modules
+       importing a module in the next level down.
+    """
+    pkg = os.path.join(directory, 'deeppkg')
+    dotted = ['deeppkg']
+    path = pkg
+    for level in range(depth):
+        _write(os.path.join(path, '__init__.py'))
+        child = '.'.join(dotted + ['p%d' % (level + 1), 'mod0'])
+        for i in range(modules):
+            _write(
+                os.path.join(path, 'mod%d.py' % i),
+                _imports([child]) if level < depth - 1 else ''
+            )
+        dotted.append('p%d' % (level + 1))
+        path = os.path.join(path, 'p%d' % (level + 1))
+    return pkg
+
+
+def cyclic(directory, modules=500, back_edges=2, seed=42):
+    """A package where the modules form one big import cycle (mod0 ->
+       mod1 -> ... -> mod0), with ``back_edges`` extra imports per module
+       creating many smaller cycles.
+    """
+    rnd = random.Random(seed)
+    pkg = os.path.join(directory, 'cyclicpkg')
+    _write(os.path.join(pkg, '__init__.py'))
+    for i in range(modules):
+        deps = [(i + 1) % modules] + [rnd.randrange(modules) for _ in range(back_edges)]
+        _write(
+            os.path.join(pkg, 'mod%d.py' % i),
+            'from . import %s\n' % ', '.join('mod%d' % j for j in deps)
+        )
+    return pkg
+
+
+def namespaces(directory, packages=300, modules=3):
+    """A script importing modules from ``packages`` PEP 420 namespace
+       packages (directories without ``__init__.py``).
+    """
+    lines = []
+    for p in range(packages):
+        for m in range(modules):
+            _write(
+                os.path.join(directory, 'ns%d' % p, 'mod%d.py' % m),
+                _imports(['ns%d.mod%d' % (p, m + 1)]) if m < modules - 1 else ''
+            )
+        lines.append('ns%d.mod0' % p)
+    main = os.path.join(directory, 'nsmain.py')
+    _write(main, _imports(lines))
+    return main
+
+
+def huge_file(directory, lines=50000):
+    """A package with one huge (generated, ``_pb2``-like) module of
+       ``lines`` lines, and a couple of small modules importing it.
+    """
+    pkg = os.path.join(directory, 'hugepkg')
+    _write(os.path.join(pkg, '__init__.py'))
+    body = ['import os', 'import sys', 'from . import small0', '']
+    for i in range(lines):
+        body.append(
+            "_M%d = dict(name='M%d', full_name='hugepkg.M%d', fields=[dict(index=0, number=1, default=b''.decode('utf-8'))])"
+            % (i, i, i)
+        )
+    _write(os.path.join(pkg, 'generated_pb2.py'), '\n'.join(body) + '\n')
+    _write(os.path.join(pkg, 'small0.py'))
+    _write(os.path.join(pkg, 'small1.py'), 'from . import generated_pb2\n')
+    return pkg
+
+
+#: name -> (generator, default parameters)
+GENERATORS = {
+    'wide': (wide, dict(modules=2000, imports=5)),
+    'deep': (deep, dict(depth=200, modules=2)),
+    'cyclic': (cyclic, dict(modules=500, back_edges=2)),
+    'namespaces': (namespaces, dict(packages=300, modules=3)),
+    'huge-file': (huge_file, dict(lines=50000)),
+}
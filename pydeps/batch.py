@@ -0,0 +1,79 @@
+"""
+Batch mode: running pydeps on many targets in one process (``--batch``).
+
+A batch file is a toml file with options for all targets at the top
+level (the same names as in the ``[tool.pydeps]`` configuration section),
+and a ``[[target]]`` table for each target::
+
+    max_bacon = 3
+    no_output = true
+    show_deps = true
+
+    [[target]]
+    fname = "services/billing"
+    deps_out = "billing.json"
+
+    [[target]]
+    fname = "services/shipping"
+    deps_out = "shipping.json"
+    cluster = true
+
+"""
+import sys
+
+from . import configs, mfimp
+from .pystdlib import pystdlib
+
+
+class SharedCaches(object):
+    """What the targets of a batch have in common, so it is only computed
+       once.
+
+       - ``scanned``: the imports found in each file (the
+         :attr:`pydeps.mf27.ModuleFinder.scanned` dict of every module
+         finder), so files imported by several targets are only compiled
+         once.
+       - ``path_cache``: the directory listings and the locations of
+         resolved modules (a :class:`pydeps.mfimp.PathCache`).
+       - the set of standard library module names (:meth:`pystdlib`).
+    """
+    def __init__(self, volatile=()):
+        #: pathname -> list of (what, args) found when scanning that file.
+        self.scanned = {}
+        self.path_cache = mfimp.PathCache(volatile)
+        self._pystdlib = None
+
+    def pystdlib(self):
+        if self._pystdlib is None:
+            self._pystdlib = pystdlib()
+        return self._pystdlib
+
+
+def _options(table):
+    """Convert the values in ``table`` (a dict from the batch file) like the
+       values in config files.
+    """
+    conf = configs.Config()
+    conf.update(table)  # warns about unknown options
+    res = {k: getattr(conf, k) for k in table if k in conf.__dict__}
+    if res.get('max_bacon') == 0:
+        res['max_bacon'] = sys.maxsize
+    return res
+
+
+def load_batch(fname):
+    """Return ``(options, targets)`` from the batch file ``fname``, where
+       ``options`` apply to all targets and each item in ``targets`` is a
+       dict with the target's ``fname`` and options.
+    """
+    if not configs.HAVE_TOML:
+        raise RuntimeError("--batch needs a toml library (e.g. `pip install tomlkit`)")
+    with open(fname) as fp:
+        try:
+            data = configs.toml.loads(fp.read())
+        except ValueError as cause:
+            raise RuntimeError("While reading {!r}: {}".format(fname, cause))
+    targets = data.pop('target', [])
+    if not isinstance(targets, list) or not all(isinstance(t, dict) and t.get('fname') for t in targets):
+        raise RuntimeError("{!r}: each [[target]] must have an fname".format(fname))
+    return _options(data), [_options(t) for t in targets]
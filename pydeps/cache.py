@@ -0,0 +1,190 @@
+"""
+Persistent on-disk caches.
+
+The caches live below ``$XDG_CACHE_HOME/pydeps`` (``~/.cache/pydeps`` if
+``XDG_CACHE_HOME`` isn't set), unless a different directory is specified
+with ``--cache-dir``.
+"""
+import hashlib
+import logging
+import marshal
+import os
+import tempfile
+from importlib.util import MAGIC_NUMBER
+
+log = logging.getLogger(__name__)
+
+#: bump this when the format of the cached data changes, old entries
+#: will then simply be ignored (and eventually evicted).
+CACHE_VERSION = 1
+
+#: default size limit (in bytes) for each cache.
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Return the directory where pydeps keeps its caches.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pydeps')
+
+
+class DiskCache(object):
+    """A directory of files, where each file holds the value for one key.
+
+       Reads update the file's modification time, so :meth:`prune` can
+       evict the least recently used entries when the cache grows past
+       ``max_size`` bytes.
+    """
+    def __init__(self, name, cache_dir=None, version=CACHE_VERSION, max_size=DEFAULT_MAX_SIZE):
+        self.directory = os.path.join(
+            cache_dir or default_cache_dir(),
+            '%s-v%d' % (name, version)
+        )
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _fname(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, key):
+        """Return the bytes stored under ``key``, or None.
+        """
+        fname = self._fname(key)
+        try:
+            with open(fname, 'rb') as fp:
+                data = fp.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(fname)   # for prune(), least recently used first
+        except OSError:
+            pass    # e.g. a read-only cache directory
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Store ``data`` (bytes) under ``key``.
+        """
+        fname = self._fname(key)
+        dirname = os.path.dirname(fname)
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            # write to a temporary file and rename it, so concurrent pydeps
+            # processes never see a partially written entry.
+            fd, tmpname = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmpname, fname)
+        except OSError as e:
+            log.debug("Couldn't write cache entry %s: %s", fname, e)
+            return
+        self.writes += 1
+
+    def size(self):
+        """Return the total size (in bytes) of the cache.
+        """
+        return sum(st.st_size for _fname, st in self._entries())
+
+    def _entries(self):
+        for root, _dirs, files in os.walk(self.directory):
+            for f in files:
+                fname = os.path.join(root, f)
+                try:
+                    yield fname, os.stat(fname)
+                except OSError:
+                    pass
+
+    def prune(self):
+        """Evict the least recently used entries until the cache is smaller
+           than ``max_size``.
+        """
+        if not self.writes:
+            return  # nothing was added, so we can't have grown.
+        entries = list(self._entries())
+        total = sum(st.st_size for _fname, st in entries)
+        if total <= self.max_size:
+            return
+        entries.sort(key=lambda e: e[1].st_mtime)
+        for fname, st in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(fname)
+            except OSError:
+                continue
+            total -= st.st_size
+        log.debug("pruned cache %s to %d bytes", self.directory, total)
+
+
+class ScanCache(DiskCache):
+    """Cache of the imports found in Python source (and .pyc) files.
+
+       The key is the file's absolute path, modification time and size,
+       together with the bytecode magic number of the running Python, so an
+       entry is never used after the file (or the Python version) changes.
+       The name of the extractor is part of the key too, since the
+       extractors don't return exactly the same tuples.
+    """
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE, extractor='bytecode'):
+        super(ScanCache, self).__init__('scan', cache_dir, max_size=max_size)
+        self.extractor = extractor
+
+    def key(self, pathname):
+        st = os.stat(pathname)
+        return '%s|%d|%d|%s|%s' % (
+            os.path.abspath(pathname), st.st_mtime_ns, st.st_size, MAGIC_NUMBER.hex(),
+            self.extractor
+        )
+
+    def get_imports(self, pathname):
+        """Return the list of ``(what, args)`` tuples found in ``pathname``,
+           or None if we haven't seen this version of the file before.
+        """
+        try:
+            data = self.get(self.key(pathname))
+        except OSError:
+            return None
+        if data is None:
+            return None
+        try:
+            return marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            return None
+
+    def put_imports(self, pathname, imports):
+        try:
+            key = self.key(pathname)
+        except OSError:
+            return
+        self.put(key, marshal.dumps(imports))
+
+
+class RenderCache(DiskCache):
+    """Cache of the output of dot.
+
+       The key is a hash of the dot source, the output format and the
+       graphviz version (the output of ``dot -V``), so the same graph is
+       only laid out once.
+    """
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE, graphviz_version=None):
+        super(RenderCache, self).__init__('render', cache_dir, max_size=max_size)
+        self.graphviz_version = graphviz_version
+
+    def key(self, src, fmt):
+        if isinstance(src, str):
+            src = src.encode('utf-8')
+        return '%s|%s|%s' % (hashlib.sha256(src).hexdigest(), fmt, self.graphviz_version)
+
+    def get_rendered(self, src, fmt):
+        """Return the output of dot for ``src`` in the format ``fmt``, or
+           None if it hasn't been rendered before.
+        """
+        return self.get(self.key(src, fmt))
+
+    def put_rendered(self, src, fmt, data):
+        self.put(self.key(src, fmt), data)
@@ -73,6 +73,7 @@ def base_argparser(argv=()):
         set log-level to one of CRITICAL, ERROR, WARNING, INFO, DEBUG, NOTSET.
     '''))
     _p.add_argument('--find-package', action='store_true', help="tries to automatically find the name of the current package.")
+    _p.add_argument('--batch', metavar="FILE", help="run pydeps on all the targets listed in FILE (toml), in one process")
     _args, argv = _p.parse_known_args(argv)
 
     if _args.log:
@@ -100,6 +101,7 @@ def parse_args(argv=()):
     """
     _p, _args, argv = base_argparser(argv)
     find_package = _args.find_package
+    batch = _args.batch
     config_files = []
 
     if not _args.no_config:  # process config files
@@ -135,19 +137,21 @@ def parse_args(argv=()):
 
     args = Arguments(config_files, debug=True, parents=[_p])
 
-    if not find_package:
+    if not find_package and not batch:
         args.add('fname', kind="FNAME:input", help='filename')
     else:
         args.add('--fname', kind="FNAME:input", help='filename')
 
     args.add('-v', '--verbose', default=0, dest='verbose', action='count', help="be more verbose (-vv, -vvv for more verbosity)")
     args.add('-o', default=None, kind="FNAME:output", dest='output', metavar="file", help="write output to 'file'")
-    args.add('-T', default='svg', dest='format', help="output format (svg|png)")
+    args.add('-T', default='svg', dest='format', help="output format (svg|png|html), or several comma separated formats (e.g. svg,png) rendered by one dot process")
+    args.add('--renderer', default='dot', choices=['dot', 'builtin'], help="lay out the graph with graphviz' dot (default), or in pydeps (fast for huge graphs, creates svg and html)")
     args.add('--display', kind="FNAME:exe", default=None, help="program to use to display the graph (png or svg file depending on the T parameter)", metavar="PROGRAM")
     args.add('--noshow', '--no-show', action='store_true', default=False, dest='no_show', help="don't call external program to display graph")
     args.add('--show-deps', action='store_true', help="show output of dependency analysis")
     args.add('--show-raw-deps', action='store_true', help="show output of dependency analysis before removing skips")
     args.add('--deps-output', dest='deps_out', default=None, kind="FNAME:output", help="write output of dependency analysis to 'file'")
+    args.add('--deps-format', default='json', choices=['json', 'compact', 'jsonl'], help="format of the dependency analysis output: indented json (default), compact json, or JSON Lines (one module per line)")
     args.add('--show-dot', action='store_true', help="show output of dot conversion")
     args.add('--dot-output', dest='dot_out', default=None, kind="FNAME:output", help="write dot code to 'file'")
     args.add('--nodot', '--no-dot', action='store_true', default=False, dest='no_dot', help="skip dot conversion")
@@ -156,6 +160,7 @@ def parse_args(argv=()):
     args.add('--debug-mf', default=0, type=int, metavar="INT", help="set the ModuleFinder.debug flag to this value")
     args.add('--noise-level', default=200, type=int, metavar="INT", help="exclude sources or sinks with degree greater than noise-level")
     args.add('--max-bacon', default=2, type=int, metavar="INT", help="exclude nodes that are more than n hops away (default=2, 0 -> infinite)")
+    args.add('--bacon-roots', default=[], nargs="+", metavar="MODULE", help="count the hops for --max-bacon from these modules (e.g. entry points) instead of from the target")
     args.add('--max-module-depth', default=0, type=int, metavar="INT", help="coalesce deep modules to at most n levels")
     args.add('--pylib', action='store_true', help="include python std lib modules")
     args.add('--pylib-all', action='store_true', help="include python all std lib modules (incl. C modules)")
@@ -174,6 +179,20 @@ def parse_args(argv=()):
     args.add('--collapse-target-cluster', action='store_true', help="collapse target module (--keep-target-cluster will be ignored)")
     args.add('--rmprefix', default=[], nargs="+", metavar="PREFIX", help="remove PREFIX from the displayed name of the nodes")
     args.add('--start-color', default=0, type=int, metavar="INT", help="starting value for hue from 0 (red/default) to 360.")
+    args.add('--scan-cache', action='store_true', help="cache the imports found in each file between runs (files are only re-scanned when they change)")
+    args.add('--cache-dir', default=None, kind="FNAME:input", metavar="DIR", help="directory for pydeps' caches (default ~/.cache/pydeps)")
+    args.add('--deps-state', default=None, kind="FNAME:output", metavar="FILE", help="save the raw dependency graph to FILE, so later runs can use --changed")
+    args.add('--changed', default=None, nargs="*", metavar="PATH", help="only re-scan these files (e.g. from `git diff --name-only`), updating the graph saved in --deps-state")
+    args.add('--jobs', default=1, type=int, metavar="INT", help="number of processes used to scan files (default=1, 0 -> one per cpu)")
+    args.add('--extractor', default='bytecode', choices=['bytecode', 'ast', 'tokenize'], help="how to find the imports in source files: compile them (default), parse them, or only tokenize the import statements (fastest)")
+    args.add('--volatile-path', default=[], nargs="+", metavar="DIR", help="directories that can change while pydeps runs (their contents are never cached)")
+    args.add('--timings', action='store_true', help="print the time spent in each stage of the run, and counters (modules loaded, edges, etc.)")
+    args.add('--timings-output', dest='timings_out', default=None, kind="FNAME:output", metavar="FILE", help="write the --timings report (json) to FILE")
+    args.add('--save-snapshot', default=None, kind="FNAME:output", metavar="FILE", help="save the modules found (the raw dependency graph) to FILE, for --from-snapshot")
+    args.add('--from-snapshot', default=None, kind="FNAME:input", metavar="FILE", help="use the modules found in an earlier run (see --save-snapshot) instead of finding them again")
+    args.add('--dot-timeout', default=None, type=float, metavar="SECONDS", help="stop dot if it hasn't finished rendering after SECONDS")
+    args.add('--render-jobs', default=0, type=int, metavar="INT", help="number of dot processes rendering concurrently in --batch mode (default=0 -> one per cpu)")
+    args.add('--no-render-cache', action='store_true', help="don't cache the output of dot (by default graphs that haven't changed aren't rendered again)")
 
     # args.write_default_config()
     _args = args.parse_args(argv)
@@ -200,6 +219,7 @@ def parse_args(argv=()):
         _args.cluster = True
     if find_package:
         _args.fname = _find_current_package()
+    _args.batch = batch
 
     _args.format = getattr(_args, 'format', 'svg')
 
@@ -29,8 +29,7 @@ class ColorSpace(object):
     def __init__(self, nodes):
         self.nodes = {}
         for node in nodes:
-            parts = node.name.split('.')
-            self.add_to_tree(parts, self.nodes)
+            self.add_to_tree(node.name_parts, self.nodes)
         self.basecolors = distinct_hues(len(self.nodes))
         self.colors = dict(zip(sorted(self.nodes.keys()), self.basecolors))
 
@@ -43,9 +42,7 @@ class ColorSpace(object):
         self.add_to_tree(rest, tree[first])
 
     def color(self, src):
-        nodename = src.name
-        parts = nodename.split('.')
-        hue = self.colors[parts[0]]
+        hue = self.colors[src.name_parts[0]]
         saturation = min(0.95, 0.4 + 0.1 * (src.out_degree - 1))
         lightness = max(0.3, 0.5 - 0.02 * (src.in_degree - 1))
         bg = rgb2eightbit(colorsys.hls_to_rgb(hue, lightness, saturation))
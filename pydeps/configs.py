@@ -141,6 +141,9 @@ class Config(object):
     #: tries to automatically find the name of the current package.
     find_package = False
 
+    #: run pydeps on all the targets listed in FILE (toml), in one process
+    batch = None
+
     #: filename
     fname = None
 
@@ -150,9 +153,14 @@ class Config(object):
     #: write output to 'file'
     output = None
 
-    #: output format (svg|png)
+    #: output format (svg|png|html), or several comma separated formats (e.g.
+    #: svg,png) rendered by one dot process
     format = 'svg'
 
+    #: lay out the graph with graphviz' dot (default), or in pydeps (fast
+    #: for huge graphs, creates svg and html)
+    renderer = 'dot'
+
     #: program to use to display the graph (png or svg file depending on the T
     #: parameter)
     display = None
@@ -169,6 +177,10 @@ class Config(object):
     #: write output of dependency analysis to 'file'
     deps_out = None
 
+    #: format of the dependency analysis output: indented json (default),
+    #: compact json, or JSON Lines (one module per line)
+    deps_format = 'json'
+
     #: show output of dot conversion
     show_dot = False
 
@@ -193,6 +205,10 @@ class Config(object):
     #: exclude nodes that are more than n hops away (default=2, 0 -> infinite)
     max_bacon = 2
 
+    #: count the hops for max_bacon from these modules (e.g. entry points)
+    #: instead of from the target
+    bacon_roots = []
+
     #: coalesce deep modules to at most n levels
     max_module_depth = 0
 
@@ -249,6 +265,56 @@ class Config(object):
     #: starting value for hue from 0 (red/default) to 360.
     start_color = 0
 
+    #: cache the imports found in each file between runs (files are only
+    #: re-scanned when they change)
+    scan_cache = False
+
+    #: directory for pydeps' caches (default ~/.cache/pydeps)
+    cache_dir = None
+
+    #: save the raw dependency graph to FILE, so later runs can use --changed
+    deps_state = None
+
+    #: only re-scan these files (e.g. from `git diff --name-only`), updating
+    #: the graph saved in --deps-state
+    changed = None
+
+    #: number of processes used to scan files (default=1, 0 -> one per cpu)
+    jobs = 1
+
+    #: how to find the imports in source files (bytecode, ast, or tokenize)
+    extractor = 'bytecode'
+
+    #: directories that can change while pydeps runs (their contents are
+    #: never cached)
+    volatile_path = []
+
+    #: print the time spent in each stage of the run, and counters (modules
+    #: loaded, edges, etc.)
+    timings = False
+
+    #: write the --timings report (json) to FILE
+    timings_out = None
+
+    #: save the modules found (the raw dependency graph) to FILE, for
+    #: --from-snapshot
+    save_snapshot = None
+
+    #: use the modules found in an earlier run (see --save-snapshot) instead
+    #: of finding them again
+    from_snapshot = None
+
+    #: stop dot if it hasn't finished rendering after SECONDS
+    dot_timeout = None
+
+    #: number of dot processes rendering concurrently in --batch mode
+    #: (0 -> one per cpu)
+    render_jobs = 0
+
+    #: don't cache the output of dot (by default graphs that haven't
+    #: changed aren't rendered again)
+    no_render_cache = False
+
     def __init__(self, **kwargs):
         for key in dir(self.__class__):
             if not key.startswith('_'):
@@ -277,6 +343,8 @@ class Config(object):
             self.output = identity(value)
         if field == 'format':
             self.format = str(value)
+        if field == 'renderer':
+            self.renderer = str(value)
         if field == 'display':
             self.display = identity(value)
         if field == 'no_show':
@@ -287,6 +355,8 @@ class Config(object):
             self.show_raw_deps = boolval(value)
         if field == 'deps_out':
             self.deps_out = identity(value)
+        if field == 'deps_format':
+            self.deps_format = str(value)
         if field == 'show_dot':
             self.show_dot = boolval(value)
         if field == 'dot_out':
@@ -303,6 +373,8 @@ class Config(object):
             self.noise_level = int(value)
         if field == 'max_bacon':
             self.max_bacon = int(value)
+        if field == 'bacon_roots':
+            self.bacon_roots = listval(value)
         if field == 'max_module_depth':
             self.max_module_depth = int(value)
         if field == 'pylib':
@@ -337,6 +409,34 @@ class Config(object):
             self.rmprefix = listval(value)
         if field == 'start_color':
             self.start_color = int(value)
+        if field == 'scan_cache':
+            self.scan_cache = boolval(value)
+        if field == 'cache_dir':
+            self.cache_dir = identity(value)
+        if field == 'deps_state':
+            self.deps_state = identity(value)
+        if field == 'changed':
+            self.changed = listval(value)
+        if field == 'jobs':
+            self.jobs = int(value)
+        if field == 'extractor':
+            self.extractor = str(value)
+        if field == 'volatile_path':
+            self.volatile_path = listval(value)
+        if field == 'timings':
+            self.timings = boolval(value)
+        if field == 'timings_out':
+            self.timings_out = identity(value)
+        if field == 'save_snapshot':
+            self.save_snapshot = identity(value)
+        if field == 'from_snapshot':
+            self.from_snapshot = identity(value)
+        if field == 'dot_timeout':
+            self.dot_timeout = float(value)
+        if field == 'render_jobs':
+            self.render_jobs = int(value)
+        if field == 'no_render_cache':
+            self.no_render_cache = boolval(value)
 
     def __iter__(self):
         return iter(self.__dict__.items())
@@ -1,15 +1,18 @@
 import enum
-import fnmatch
+import io
 import json
 import logging
 import os
 import pprint
-import re
 import sys
+from array import array
 from collections import defaultdict, deque
+from collections.abc import Mapping
 from itertools import zip_longest
 
 from . import colors, cli
+from .matcher import PatternMatcher
+from .timings import Timings
 
 log = logging.getLogger(__name__)
 
@@ -39,20 +42,65 @@ class Source(object):
 
        It contains info about which modules are imported by this source,
        and which modules import this source.
+
+       The data lives in the :class:`DepGraph`'s arrays, a Source is only a
+       view of node number ``index`` (which is only valid until the graph
+       removes nodes, e.g. in :meth:`DepGraph.remove_excluded`).
     """
-    def __init__(self, name, path=None, imports=(), exclude=False, args=None):
-        self.args = args or {}
-        self.name = name
-        # self.kind = kind
-        self.path = path             # needed here..?
-        self.imports = set(imports)  # modules we import
-        self.imported_by = set()     # modules that import us
-        self.bacon = sys.maxsize      # bacon distance
-        self.excluded = exclude
+    __slots__ = ('graph', 'index')
+
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+
+    @property
+    def args(self):
+        return self.graph.args
+
+    @property
+    def name(self):
+        return self.graph._names[self.index]
+
+    @property
+    def path(self):
+        return self.graph._paths[self.index]
+
+    @property
+    def bacon(self):
+        """Bacon distance (number of hops from __main__).
+        """
+        return self.graph._bacon[self.index]
+
+    @bacon.setter
+    def bacon(self, value):
+        self.graph._bacon[self.index] = value
+
+    @property
+    def excluded(self):
+        return bool(self.graph._excluded[self.index])
+
+    @excluded.setter
+    def excluded(self, value):
+        self.graph._excluded[self.index] = bool(value)
+
+    @property
+    def imports(self):
+        """Names of the modules we import.
+        """
+        return self.graph._neighbour_names(self.graph._imports, self.index)
+
+    @property
+    def imported_by(self):
+        """Names of the modules that import us.
+        """
+        return self.graph._neighbour_names(self.graph._imported_by, self.index)
 
     @property
     def name_parts(self):
-        return self.name.split('.')
+        """The parts of the dotted name (a new list, the name is only
+           split once).
+        """
+        return list(self.graph._split_name(self.name))
 
     @property
     def module_depth(self):
@@ -60,20 +108,24 @@ class Source(object):
 
     @property
     def path_parts(self):
-        p = self.path or ""
-        return p.replace('\\', '/').lower().split('/')
+        """The lowercased parts of the path (a new list, the path is only
+           split once).
+        """
+        return list(self.graph._split_path(self.path))
 
     @property
     def in_degree(self):
         """Number of incoming arrows.
         """
-        return len(self.imports)
+        offsets = self.graph._imports[0]
+        return offsets[self.index + 1] - offsets[self.index]
 
     @property
     def out_degree(self):
         """Number of outgoing arrows.
         """
-        return len(self.imported_by)
+        offsets = self.graph._imported_by[0]
+        return offsets[self.index + 1] - offsets[self.index]
 
     @property
     def degree(self):
@@ -127,22 +179,6 @@ class Source(object):
     def __repr__(self):
         return json.dumps(self.__json__(), indent=4)
 
-    def __iadd__(self, other):
-        """Merge other into self.
-        """
-        if self.name == other.name and self.imports == other.imports and self.bacon == other.bacon:
-            return self
-        log.debug("iadd lhs: %r", self)
-        log.debug("iadd rhs: %r", other)
-        assert self.name == other.name
-        self.path = self.path or other.path
-        self.imports |= other.imports
-        self.imported_by |= other.imported_by
-        self.bacon = min(self.bacon, other.bacon)
-        self.excluded = self.excluded or other.excluded
-        log.debug("iadd result: %r", self)
-        return self
-
     def get_label(self, splitlength=0, rmprefix=None):
         name = self.name
         if rmprefix:
@@ -162,6 +198,101 @@ class Source(object):
         return self.get_label(splitlength=14)
 
 
+def adjacency_arrays(n, edges):
+    """Convert a list of ``(u, v)`` edges between the nodes ``0..n-1`` to
+       compressed adjacency arrays ``(offsets, targets)``, where the
+       neighbours of ``u`` are ``targets[offsets[u]:offsets[u + 1]]`` (in
+       the order they were found in ``edges``).
+    """
+    offsets = [0] * (n + 1)
+    for u, _v in edges:
+        offsets[u + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    pos = offsets[:-1]
+    targets = [0] * len(edges)
+    for u, v in edges:
+        targets[pos[u]] = v
+        pos[u] += 1
+    return array('i', offsets), array('i', targets)
+
+
+def transposed_arrays(offsets, targets):
+    """Return the adjacency arrays of the graph with all the edges in
+       ``offsets`` and ``targets`` reversed.
+    """
+    n = len(offsets) - 1
+    counts = [0] * (n + 1)
+    for v in targets:
+        counts[v + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    pos = counts[:-1]
+    sources = [0] * len(targets)
+    for u in range(n):
+        for v in targets[offsets[u]:offsets[u + 1]]:
+            sources[pos[v]] = u
+            pos[v] += 1
+    return array('i', counts), array('i', sources)
+
+
+def strongly_connected_components(offsets, targets):
+    """Return the strongly connected components (lists of node numbers) of
+       the graph in the adjacency arrays ``offsets`` and ``targets`` (see
+       :func:`adjacency_arrays`).
+
+       This is Tarjan's algorithm, with an explicit stack instead of
+       recursion, so it works for arbitrarily deep graphs. The components
+       are returned in reverse topological order.
+    """
+    n = len(offsets) - 1
+    index = [-1] * n        # dfs visiting order (-1 = not visited)
+    lowlink = [0] * n
+    onstack = [False] * n
+    nxt = offsets[:-1]      # next edge to follow for each node
+    stack = []              # nodes of the components that are not done yet
+    path = []               # the dfs path (replaces the call stack)
+    components = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        onstack[root] = True
+        path.append(root)
+        while path:
+            v = path[-1]
+            i = nxt[v]
+            if i < offsets[v + 1]:
+                nxt[v] = i + 1
+                w = targets[i]
+                if index[w] < 0:
+                    index[w] = lowlink[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    onstack[w] = True
+                    path.append(w)
+                elif onstack[w] and index[w] < lowlink[v]:
+                    lowlink[v] = index[w]
+                continue
+            path.pop()
+            if path and lowlink[v] < lowlink[path[-1]]:
+                lowlink[path[-1]] = lowlink[v]
+            if lowlink[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    onstack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
 class GraphNode:
     def __init__(self, src, index=None):
         self.src = src
@@ -206,13 +337,22 @@ class Graph:
         return Graph(self.V, [(v, u) for u, v in self.edges])
 
     def dfs(self, v, visited, stack):
+        """Append the nodes reachable from ``v`` to ``stack`` in post-order
+           (iteratively, so deep graphs don't hit the recursion limit).
+        """
         visited[v.index] = True
-        for neighbour in self.neighbours[v]:
-            if not visited[neighbour.index]:
-                self.dfs(neighbour, visited, stack)
-        stack.append(v)
- 
-    
+        path = [(v, iter(self.neighbours[v]))]
+        while path:
+            node, neighbours = path[-1]
+            for neighbour in neighbours:
+                if not visited[neighbour.index]:
+                    visited[neighbour.index] = True
+                    path.append((neighbour, iter(self.neighbours[neighbour])))
+                    break
+            else:
+                path.pop()
+                stack.append(node)
+
     def fill_order(self):
         def _fill_order(visited, stack):
             for i, node in enumerate(self.V):
@@ -225,15 +365,7 @@ class Graph:
 
     def dfs_util(self, v, visited):
         component = []
-
-        def _dfs_util(v, visited):
-            visited[v.index] = True
-            component.append(v)
-            for neighbour in self.neighbours[v]:
-                if not visited[neighbour.index]:
-                    _dfs_util(neighbour, visited)
-
-        _dfs_util(v, visited)
+        self.dfs(v, visited, component)
         return set(component)
 
     def kosaraju(self):
@@ -251,6 +383,25 @@ class Graph:
         return sorted(scc_list, key=lambda x: len(x), reverse=True)
 
 
+class _Sources(Mapping):
+    """Read-only ``{module_name: Source}`` view of a :class:`DepGraph`.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        return Source(self.graph, self.graph._index[name])
+
+    def __contains__(self, name):
+        return name in self.graph._index
+
+    def __iter__(self):
+        return iter(self.graph._names)
+
+    def __len__(self):
+        return len(self.graph._names)
+
+
 class DepGraph(object):
     """The dependency graph.
 
@@ -277,66 +428,98 @@ class DepGraph(object):
 
         self.args = args
 
+        #: The nodes are numbered, and all data about them is stored in
+        #: arrays indexed by node number: the interned module names (and
+        #: the reverse mapping), the paths, bacon distances and excluded
+        #: flags.
+        self._names = []
+        self._index = {}
+        self._paths = []
+        self._bacon = array('q')
+        self._excluded = bytearray()
+        #: module name/path -> the parts of the name/path (the names and
+        #: paths are split once, even when the nodes are renumbered)
+        self._name_parts = {}
+        self._path_parts = {}
+        #: module name -> the first 4 parts of the name (see _head_parts)
+        self._name_heads = {}
+        #: imports and imported_by edges as compressed adjacency arrays
+        #: (see :func:`adjacency_arrays`).
+        self._imports = self._imported_by = adjacency_arrays(0, [])
+
         #: dict[module_name] -> Source object
-        self.sources = {}
-        self._accepted = set()
-        self._rejected = set()
-        self.skiplist = [re.compile(fnmatch.translate(arg)) for arg in args['exclude']]
-        self.skiplist += [re.compile('^%s$' % fnmatch.translate(arg)) for arg in args['exclude_exact']]
+        self.sources = _Sources(self)
+        #: the excluded modules: the --exclude/--exclude-exact patterns, and
+        #: the names added by _add_skip
+        self.skiplist = PatternMatcher(args['exclude'] + args['exclude_exact'])
         # depgraf = {name: imports for (name, imports) in depgraf.items()}
 
-        for name, imports in depgraf.items():
-            log.debug("depgraph name=%r imports=%r", name, imports)
-            src = Source(
-                name=self.source_name(name),
-                imports=[self.source_name(n) for n in imports.keys()],  # values handled below
-                args=args,
-                exclude=self._exclude(name),
-            )
-            log.debug("depgraph src=%r", src)
-            self.add_source(src)
-            for iname, path in imports.items():
-                src = Source(
-                    name=self.source_name(iname, path),
-                    path=path,
-                    args=args,
-                    exclude=self._exclude(iname)
-                )
-                self.add_source(src)
+        timings = args.get('timings')
+        if not isinstance(timings, Timings):
+            timings = Timings()
+        debug = log.isEnabledFor(logging.DEBUG)
+        with timings.stage('depgraph'):
+            edges = {}  # (a, b) -> None, i.e. an ordered set of a-imports-b edges
+            # a node that is seen again only gets the path (and exclude
+            # flag) merged in if it imports something (as with the Source
+            # objects this replaced, a module first seen as an importer
+            # without imports keeps a null path).
+            importers = set()
+            for name, imports in depgraf.items():
+                if debug:
+                    log.debug("depgraph name=%r imports=%r", name, imports)
+                if imports:
+                    a = self.add_source(self.source_name(name), exclude=self._exclude(name))
+                    importers.add(a)
+                else:
+                    a = self._merge_source(importers, self.source_name(name), None, self._exclude(name))
+                for iname, path in imports.items():
+                    self._merge_source(importers, self.source_name(iname, path), path, self._exclude(iname))
+                    # the edge goes to the module name without the path (they
+                    # are only different for __main__)
+                    b = self._index.get(self.source_name(iname))
+                    if b is None:
+                        b = self.add_source(self.source_name(iname))
+                    edges[a, b] = None
+            self._imports = adjacency_arrays(len(self._names), list(edges))
+        timings.count('edges created', len(edges))
 
         self.module_count = len(self.sources)
         cli.verbose(1, "there are", self.module_count, "total modules")
 
-        self.connect_generations()
-        # if self.args['show_cycles']:
-        #     self.find_import_cycles()
-        self.calculate_bacon()
-        if self.args['show_raw_deps']:
-            print(self)
-
-        self.exclude_noise()
-        self.exclude_bacon(self.args['max_bacon'])
-        self.only_filter(self.args.get('only'))
-
-        excluded = [v for v in list(self.sources.values()) if v.excluded]
-        # print "EXCLUDED:", excluded
-        self.skip_count = len(excluded)
-        cli.verbose(1, "skipping", self.skip_count, "modules")
-        for module in excluded:
-            # print 'exclude:', module.name
-            cli.verbose(2, "  ", module.name)
-
-        self.remove_excluded()
-
-        self.find_import_cycles()
-
-        if self.args.get('show_cycles'):
-            for name in list(self.sources):
-                if name not in self.cyclenodes:
-                    del self.sources[name]
-            for src in self.sources.values():
-                src.imports = [m for m in src.imports if m in self.cyclenodes]
-                src.imported_by = [m for m in src.imported_by if m in self.cyclenodes]
+        with timings.stage('filter'):
+            self.connect_generations()
+            # if self.args['show_cycles']:
+            #     self.find_import_cycles()
+            roots = self.args.get('bacon_roots')
+            self.calculate_bacon(
+                [self.source_name(name) for name in roots] if roots else None,
+                self.args['max_bacon'],
+            )
+            if self.args['show_raw_deps']:
+                print(self)
+
+            self.exclude_noise()
+            self.exclude_bacon(self.args['max_bacon'])
+            self.only_filter(self.args.get('only'))
+
+            excluded = [v for v in list(self.sources.values()) if v.excluded]
+            # print "EXCLUDED:", excluded
+            self.skip_count = len(excluded)
+            cli.verbose(1, "skipping", self.skip_count, "modules")
+            for module in excluded:
+                # print 'exclude:', module.name
+                cli.verbose(2, "  ", module.name)
+
+            self.remove_excluded()
+
+            self.find_import_cycles()
+
+            if self.args.get('show_cycles'):
+                cycles = [[src.name for src in c] for c in self.cycles]
+                self._keep([name in self.cyclenodes for name in self._names])
+                self.cycles = [[self.sources[name] for name in c] for c in cycles]
+        timings.count('regexes evaluated', self.skiplist.regex_calls)
 
         if not self.args['show_deps']:
             cli.verbose(3, self)
@@ -361,8 +544,50 @@ class DepGraph(object):
         return res
 
     def __json__(self):
-        return json.dumps(self.sources, indent=4, sort_keys=True,
-                          default=lambda obj: obj.__json__() if hasattr(obj, '__json__') else obj)
+        fp = io.StringIO()
+        self.write_json(fp)
+        return fp.getvalue()
+
+    def write_json(self, fp, format='json'):
+        """Write the graph to the file object ``fp``, one source at a time
+           (so the whole serialized graph is never in memory).
+
+           ``format`` is one of:
+
+           - ``json``: the same text as :meth:`__json__` (indented, with
+             sorted keys),
+           - ``compact``: the same json object, without whitespace,
+           - ``jsonl``: JSON Lines, one source object per line.
+        """
+        names = sorted(self._names)
+        records = (Source(self, self._index[name]).__json__() for name in names)
+        if format == 'jsonl':
+            for record in records:
+                fp.write(json.dumps(record, sort_keys=True))
+                fp.write('\n')
+        elif format == 'compact':
+            fp.write('{')
+            for i, (name, record) in enumerate(zip(names, records)):
+                if i:
+                    fp.write(',')
+                fp.write(json.dumps(name))
+                fp.write(':')
+                fp.write(json.dumps(record, separators=(',', ':'), sort_keys=True))
+            fp.write('}')
+        elif format == 'json':
+            if not names:
+                fp.write('{}')
+                return
+            fp.write('{')
+            for i, (name, record) in enumerate(zip(names, records)):
+                fp.write(',\n    ' if i else '\n    ')
+                fp.write(json.dumps(name))
+                fp.write(': ')
+                # the record is nested one level deeper than json.dumps thinks
+                fp.write(json.dumps(record, indent=4, sort_keys=True).replace('\n', '\n    '))
+            fp.write('\n}')
+        else:
+            raise ValueError("Unknown json format: %r" % format)
 
     def levelcounts(self):
         pass
@@ -385,8 +610,45 @@ class DepGraph(object):
             return colorspace.color(src)
 
     def _is_pylib(self, path):
-        log.info('path %r in PYLIB_PATH %r => %s', path, PYLIB_PATH, path in PYLIB_PATH)
-        return path in PYLIB_PATH
+        res = path in PYLIB_PATH
+        log.info('path %r in PYLIB_PATH %r => %s', path, PYLIB_PATH, res)
+        return res
+
+    def _split_name(self, name):
+        parts = self._name_parts.get(name)
+        if parts is None:
+            parts = self._name_parts[name] = tuple(name.split('.'))
+        return parts
+
+    def _split_path(self, path):
+        parts = self._path_parts.get(path)
+        if parts is None:
+            parts = self._path_parts[path] = tuple((path or "").replace('\\', '/').lower().split('/'))
+        return parts
+
+    def _head_parts(self, name):
+        """The first 4 parts of the dotted ``name``, padded with None.
+        """
+        parts = self._name_heads.get(name)
+        if parts is None:
+            parts = self._name_heads[name] = tuple(
+                p for p, _n in zip_longest(self._split_name(name)[:4], range(4))
+            )
+        return parts
+
+    def _matching_parts(self, a, b):
+        """Return the number of positions (of the first 4) where the names
+           of ``a`` and ``b`` have the same part, and the number of
+           positions where both names have no part.
+        """
+        same = missing = 0
+        for ap, bp in zip(self._head_parts(a.name), self._head_parts(b.name)):
+            if ap == bp:
+                if ap is None:
+                    missing += 1
+                else:
+                    same += 1
+        return same, missing
 
     def proximity_metric(self, a, b):
         """Return the weight of the dependency from a to b. Higher weights
@@ -396,13 +658,7 @@ class DepGraph(object):
 
            Returns an int between 1 (unknown, default), and 4 (very related).
         """
-        res = 0
-        for ap, bp, n in zip(a.name_parts, b.name_parts, list(range(4))):
-            res += ap == bp
-            if n >= 3:
-                break
-        if res == 0: res = 1    # noqa
-        return 4 if res > 4 else res
+        return self.edge_metrics(a, b)[0]
 
     def dissimilarity_metric(self, a, b):
         """Return non-zero if references to this module are strange, and
@@ -412,132 +668,182 @@ class DepGraph(object):
 
            Returns an int between 1 (default) and 4 (highly unrelated).
         """
-        res = 4
-        for an, bn, n in zip_longest(a.name_parts, b.name_parts, list(range(4))):
-            res -= an == bn
-            if n >= 3:
-                break
-        return 4 if res > 4 else res
+        return self.edge_metrics(a, b)[1]
+
+    def edge_metrics(self, a, b):
+        """Return ``(proximity_metric(a, b), dissimilarity_metric(a, b))``,
+           comparing the names only once.
+        """
+        same, missing = self._matching_parts(a, b)
+        return same or 1, 4 - same - missing
 
     def _exclude(self, name):
-        # Check if in cache
-        if name in self._accepted:
-            return False
-        if name in self._rejected:
-            return True
-        
-        # calculate if match against any pattern - expensive steep
-        is_excluded = any(skip.match(name) for skip in self.skiplist)
-        
-        # add to cache
-        if is_excluded:
-            self._rejected.add(name)
-        else:
-            self._accepted.add(name)
-        
-        return is_excluded
+        return self.skiplist(name)
 
-    def add_source(self, src):
-        if src.name in self.sources:
-            log.debug("ADD-SOURCE[+=]\n%r", src)
-            self.sources[src.name] += src   # merge
+    def add_source(self, name, path=None, exclude=False):
+        """Add a node for module ``name`` (or merge with the existing node),
+           and return its number.
+        """
+        i = self._index.get(name)
+        if i is None:
+            i = self._index[name] = len(self._names)
+            self._names.append(name)
+            self._paths.append(path)
+            self._bacon.append(sys.maxsize)
+            self._excluded.append(exclude)
         else:
-            log.debug("ADD-SOURCE[=]\n%r", src)
-            self.sources[src.name] = src
+            self._paths[i] = self._paths[i] or path
+            self._excluded[i] = self._excluded[i] or exclude
+        return i
+
+    def _merge_source(self, importers, name, path, exclude):
+        """:meth:`add_source`, but an existing node that isn't in
+           ``importers`` is left as it is.
+        """
+        i = self._index.get(name)
+        if i is not None and i not in importers:
+            return i
+        return self.add_source(name, path, exclude)
+
+    def _neighbour_names(self, arrays, i):
+        offsets, targets = arrays
+        names = self._names
+        return [names[j] for j in targets[offsets[i]:offsets[i + 1]]]
+
+    def _keep(self, keep):
+        """Remove the nodes where ``keep[i]`` is false (and all their
+           edges), and renumber the rest.
+        """
+        n = len(self._names)
+        number = [-1] * n
+        count = 0
+        for i in range(n):
+            if keep[i]:
+                number[i] = count
+                count += 1
+        offsets, targets = self._imports
+        edges = [
+            (number[a], number[targets[j]])
+            for a in range(n) if keep[a]
+            for j in range(offsets[a], offsets[a + 1]) if keep[targets[j]]
+        ]
+        self._names = [name for name, k in zip(self._names, keep) if k]
+        self._index = {name: i for i, name in enumerate(self._names)}
+        self._paths = [path for path, k in zip(self._paths, keep) if k]
+        self._bacon = array('q', [b for b, k in zip(self._bacon, keep) if k])
+        self._excluded = bytearray(x for x, k in zip(self._excluded, keep) if k)
+        self._imports = adjacency_arrays(count, edges)
+        self._imported_by = transposed_arrays(*self._imports)
 
     def __getitem__(self, item):
         return self.sources[item]
 
-    def __iter__(self):
-        visited = set(self.skip_modules) | set(self.args['exclude'])
-
-        def visit(src):
-            if src.name in visited:
-                return
-            visited.add(src.name)
-            for name in src.imports:
-                impmod = self.sources[name]
+    def edges(self):
+        """Yield an ``(imported, importer)`` pair of :class:`Source` objects
+           for each import in the graph, except a module's imports of its
+           parent packages and the imports of the modules in
+           ``skip_modules`` and ``--exclude``.
 
+           This is a single scan of the imports adjacency arrays, i.e.
+           O(edges).
+        """
+        skip = set(self.skip_modules) | set(self.args['exclude'])
+        offsets, targets = self._imports
+        names = self._names
+        for i, name in enumerate(names):
+            if name in skip or offsets[i] == offsets[i + 1]:
+                continue
+            src = Source(self, i)
+            for j in targets[offsets[i]:offsets[i + 1]]:
                 # FIXME: why do we want to exclude **/*/__init__.py? This line
                 # causes `collections` package in py3 to be excluded.
                 # if impmod.path and not impmod.path.endswith('__init__.py'):
-                if not src.name.startswith(impmod.name + "."):
+                if not name.startswith(names[j] + "."):
+                    impmod = Source(self, j)
+                    cli.verbose(4, "Yielding", impmod, src)
                     yield impmod, src
-                visit(impmod)
 
-        for _src in self.sources.values():
-            for source in visit(_src):
-                cli.verbose(4, "Yielding", source[0], source[1])
-                yield source
+    def __iter__(self):
+        return self.edges()
 
     def __repr__(self):
-        return json.dumps(self.sources, indent=4, sort_keys=True,
+        return json.dumps(dict(self.sources), indent=4, sort_keys=True,
                           default=lambda obj: obj.__json__() if hasattr(obj, '__json__') else obj)
 
     def find_import_cycles(self):
-        """Divide the graph into strongly connected components using kosaraju's algorithm.
+        """Divide the graph into strongly connected components (using
+           Tarjan's algorithm), and record the ones with more than one node.
         """
-
-        vertices = {src.name: GraphNode(src) for src in sorted(
-            self.sources.values(), key=lambda x: x.name.lower()
-        )}
-        edges = []
-        for u in vertices.values():
-            for v in u.src.imported_by:
-                tmp = self.sources[v]
-                edges.append((u, vertices[tmp.name]))
-        graph = Graph(vertices.values(), edges)
-
-        scc = [c for c in graph.kosaraju() if len(c) > 1]
-        self.cycles = [[n.src for n in c] for c in scc]
-        for c in scc:
-            for node in c:
-                self.cyclenodes.add(node.src.name)
+        scc = [c for c in strongly_connected_components(*self._imported_by) if len(c) > 1]
+        scc.sort(key=len, reverse=True)
+        self.cycles = [[Source(self, i) for i in c] for c in scc]
+        for c in self.cycles:
+            for src in c:
+                self.cyclenodes.add(src.name)
             # c = list(c)
             # for i in range(len(c) - 1):
             #     self.cyclerelations.add((c[i].src.name, c[i + 1].src.name))
 
     def connect_generations(self):
-        """Traverse depth-first adding imported_by.
+        """Create the imported_by edges (by reversing the imports edges).
         """
-        for src in self.sources.values():
-            for _child in src.imports:
-                if _child in self.sources:
-                    child = self.sources[_child]
-                    child.imported_by.add(src.name)
-
-    def calculate_bacon(self):
-        count = defaultdict(int)
-
-        def bacon(src, n):
-            count[src.name] += 1
-            if src.bacon <= n:
-                return
-            src.bacon = min(src.bacon, n)
-            for imp in src.imports:
-                bacon(self.sources[imp], n + 1)
+        self._imported_by = transposed_arrays(*self._imports)
 
-        if '__main__' in self.sources:
-            bacon(self.sources['__main__'], 0)
-        elif self.args['dummyname'] in self.sources:
-            bacon(self.sources[self.args['dummyname']], 0)
+    def calculate_bacon(self, roots=None, limit=None):
+        """Set the bacon distance of each module to the smallest number of
+           hops from one of the ``roots`` (__main__, or the dummy module, by
+           default), with a breadth-first search.
+
+           The search stops after ``limit`` hops, modules that are further
+           away keep the distance ``sys.maxsize``.
+        """
+        if roots is None:
+            roots = [name for name in ('__main__', self.args['dummyname']) if name in self._index][:1]
+        offsets, targets = self._imports
+        bacon = self._bacon
+        bacon[:] = array('q', [sys.maxsize]) * len(bacon)
+        frontier = []
+        for name in roots:
+            i = self._index.get(name)
+            if i is None:
+                cli.verbose(1, "bacon root", name, "is not in the graph")
+            elif bacon[i]:
+                bacon[i] = 0
+                frontier.append(i)
+
+        distance = 0
+        while frontier and (limit is None or distance < limit):
+            distance += 1
+            nextfrontier = []
+            for i in frontier:
+                for j in targets[offsets[i]:offsets[i + 1]]:
+                    if bacon[j] > distance:
+                        bacon[j] = distance
+                        nextfrontier.append(j)
+            frontier = nextfrontier
 
     def exclude_noise(self):
-        for src in list(self.sources.values()):
-            if src.excluded:
+        noise = self.args['noise_level']
+        imports = self._imports[0]
+        imported_by = self._imported_by[0]
+        for i, name in enumerate(self._names):
+            if self._excluded[i]:
                 continue
-            if src.is_noise():
-                cli.verbose(2, "excluding", src, "because it is noisy:", src.degree)
-                src.excluded = True
-                self._add_skip(src.name)
+            in_degree = imports[i + 1] - imports[i]
+            out_degree = imported_by[i + 1] - imported_by[i]
+            # see Source.is_noise()
+            if not (in_degree and out_degree) and in_degree + out_degree > noise:
+                cli.verbose(2, "excluding", Source(self, i), "because it is noisy:", in_degree + out_degree)
+                self._excluded[i] = True
+                self._add_skip(name)
 
     def exclude_bacon(self, limit):
         """Exclude modules that are more than `limit` hops away from __main__.
         """
-        for src in list(self.sources.values()):
-            if src.bacon > limit:
-                src.excluded = True
-                self._add_skip(src.name)
+        for i, bacon in enumerate(self._bacon):
+            if bacon > limit:
+                self._excluded[i] = True
+                self._add_skip(self._names[i])
 
     def only_filter(self, paths):
         """Exclude nodes that have a prefix in paths.
@@ -561,15 +867,8 @@ class DepGraph(object):
     def remove_excluded(self):
         """Remove all sources marked as excluded.
         """
-        sources = list(self.sources.values())
-        for src in sources:
-            if src.excluded:
-                del self.sources[src.name]
-            src.imports = [m for m in src.imports if not self._exclude(m)]
-            src.imported_by = [m for m in src.imported_by if not self._exclude(m)]
+        self._keep([not x for x in self._excluded])
 
     def _add_skip(self, name):
         # print 'add skip:', name
-        self.skiplist.append(re.compile(fnmatch.translate(name)))
-        self._accepted.clear()
-        self._rejected.clear()
+        self.skiplist.add(name)
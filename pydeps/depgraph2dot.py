@@ -39,13 +39,10 @@ class PyDepGraphDot(object):
                 except KeyError:
                     continue
                 drawn.add((bname, aname))
-                ctx.write_rule(
-                    aname, bname,
-                    weight=depgraph.proximity_metric(a, b),
-                    minlen=depgraph.dissimilarity_metric(a, b),
-                )
+                weight, minlen = depgraph.edge_metrics(a, b)
+                ctx.write_rule(aname, bname, weight=weight, minlen=minlen)
 
-            for a, b in sorted(depgraph):
+            for a, b in sorted(depgraph.edges()):
                 # b imports a
                 aname = a.name
                 bname = b.name
@@ -53,10 +50,8 @@ class PyDepGraphDot(object):
                     continue
                 drawn.add((bname, aname))
 
-                ctx.write_rule(
-                    aname, bname,
-                    weight=depgraph.proximity_metric(a, b),
-                    minlen=depgraph.dissimilarity_metric(a, b))
+                weight, minlen = depgraph.edge_metrics(a, b)
+                ctx.write_rule(aname, bname, weight=weight, minlen=minlen)
 
                 visited.add(a)
                 visited.add(b)
@@ -4,6 +4,7 @@ Graphviz interface.
 import os
 import platform
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import Popen
 import subprocess
 import shlex
@@ -12,6 +13,8 @@ from . import cli
 
 win32 = sys.platform == 'win32'
 
+_graphviz_version = []
+
 
 def to_bytes(s):  # pragma: nocover
     """Convert an item into bytes.
@@ -31,36 +34,89 @@ def cmd2args(cmd):
     return cmd
 
 
-def pipe(cmd, txt):
+def pipe(cmd, txt, timeout=None):
     """Pipe `txt` into the command `cmd` and return the output.
+
+       Raises RuntimeError if the command fails (exits with a non-zero
+       status), or doesn't finish in `timeout` seconds (the command is
+       then killed).
     """
-    return Popen(
+    proc = Popen(
         cmd2args(cmd),
         stdout=subprocess.PIPE,
         stdin=subprocess.PIPE,
-        shell=win32
-    ).communicate(txt)[0]
+        shell=win32 and isinstance(cmd, str)
+    )
+    try:
+        out = proc.communicate(txt, timeout=timeout)[0]
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        raise RuntimeError("{!r} didn't finish in {} seconds".format(cmd, timeout))
+    if proc.returncode != 0:
+        raise RuntimeError("{!r} failed with exit code {}".format(cmd, proc.returncode))
+    return out
 
 
-def dot(src, **kw):
+def dot(src, timeout=None, outputs=(), **kw):
     """Execute the dot command to create an svg output.
+
+       `outputs` is a list of ``(format, filename)`` pairs, graphviz then
+       lays out the graph once and writes all of them (instead of
+       returning the -T format).
     """
-    cmd = "dot -Gstart=1 -T%s" % kw.pop('T', 'svg')
+    fmt = kw.pop('T', 'svg')
+    # an argument list (not a command line), so file names don't need
+    # any quoting on any platform.
+    cmd = ['dot', '-Gstart=1']
+    if outputs:
+        for fmt, fname in outputs:
+            cmd += ['-T' + fmt, '-o' + fname]
+    else:
+        cmd.append('-T' + fmt)
     for k, v in list(kw.items()):
         if v is True:
-            cmd += " -%s" % k
+            cmd.append('-%s' % k)
         else:
-            cmd += " -%s%s" % (k, v)
+            cmd.append('-%s%s' % (k, v))
 
-    return pipe(cmd, to_bytes(src))
+    return pipe(cmd, to_bytes(src), timeout)
 
 
-def call_graphviz_dot(src, fmt):
+def graphviz_version():
+    """Return the output of ``dot -V`` (which contains the graphviz
+       version), or None if we cannot run dot.
+    """
+    if not _graphviz_version:
+        try:
+            res = subprocess.run(
+                cmd2args("dot -V"),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                shell=win32,
+                timeout=60,
+            )
+            version = res.stdout.decode('utf-8', 'replace').strip() if res.returncode == 0 else None
+        except (OSError, subprocess.SubprocessError):
+            version = None
+        _graphviz_version.append(version)
+    return _graphviz_version[0]
+
+
+def call_graphviz_dot(src, fmt, timeout=None, outputs=(), cache=None):
     """Call dot command, and provide helpful error message if we
        cannot find it.
+
+       When `cache` (a :class:`pydeps.cache.RenderCache`) is given, the
+       output is taken from (and saved to) the cache.
     """
+    if cache is not None and not outputs:
+        svg = cache.get_rendered(src, fmt)
+        if svg:
+            return svg
     try:
-        svg = dot(src, T=fmt)
+        svg = dot(src, T=fmt, timeout=timeout, outputs=outputs)
     except OSError as e:  # pragma: nocover
         if e.errno == 2:
             cli.error("""
@@ -71,9 +127,53 @@ def call_graphviz_dot(src, fmt):
                on your path.
             """)
         raise
+    if cache is not None and not outputs and svg and svg.strip():
+        cache.put_rendered(src, fmt, svg)
     return svg
 
 
+class RenderPool(object):
+    """Runs rendering jobs (that call dot) in a pool of threads, so at most
+       `jobs` dot processes run at the same time.
+
+       The jobs are collected in ``pending`` until :meth:`wait` is called.
+    """
+    def __init__(self, jobs=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(self.jobs)
+        #: futures of the submitted jobs
+        self.pending = []
+
+    def submit(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the pool, and return its future.
+        """
+        future = self._executor.submit(fn, *args, **kwargs)
+        self.pending.append(future)
+        return future
+
+    def dot(self, src, **kw):
+        """Like :func:`dot`, but returns a future of the output.
+        """
+        return self.submit(dot, src, **kw)
+
+    def wait(self):
+        """Wait for all pending jobs to finish.
+        """
+        pending, self.pending = self.pending, []
+        for future in pending:
+            future.exception()
+        return pending
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 def in_wsl():
     """Are we running under wsl?
     """
@@ -1,3 +1,4 @@
+import io
 import os
 import textwrap
 import logging
@@ -44,20 +45,31 @@ def python_sources_below(directory, package=True):
 
 
 class DummyModule(object):
-    """We create a file that imports the module to be investigated.
+    """We create a module that imports the module to be investigated.
+
+       For packages and directories the module is only generated in memory
+       (``self.source``), ``self.fname`` is the name the module finder
+       gives it. For python source files ``self.fname`` is the file itself
+       and ``self.source`` is None.
+
+       ``self.pathname`` is the file name to give the module finder (an
+       absolute path for python source files, nothing is read relative to
+       the current directory).
     """
     def __init__(self, target, **args):
         self._legal_mnames = {}
         self.target = target
         self.fname = '_dummy_' + target.modpath.replace('.', '_') + '.py'
-        self.absname = os.path.join(target.workdir, self.fname)
+        self.pathname = self.fname
+        self.source = None
 
         if target.is_module:
             cli.verbose(1, "target is a PACKAGE")
-            with open(self.fname, 'w') as fp:
+            with io.StringIO() as fp:
                 for fname in python_sources_below(target.package_root):
                     modname = fname2modname(fname, target.syspath_dir)
                     self.print_import(fp, modname)
+                self.source = fp.getvalue()
 
         elif target.is_dir:
             # FIXME?: not sure what the intended semantics was here, as it is
@@ -67,7 +79,7 @@ class DummyModule(object):
             log.debug('fname: %r', self.fname)
             log.debug('target.dirname: %r', target.dirname)
 
-            with open(self.fname, 'w') as fp:
+            with io.StringIO() as fp:
                 dirname = os.path.abspath(os.path.join(target.calling_dir, target.calling_fname))
                 for fname in os.listdir(dirname):
                     fname = os.path.join(dirname, fname)
@@ -79,6 +91,7 @@ class DummyModule(object):
                         for fnamea in python_sources_below(fname):
                             modname = fname2modname(fnamea, target.syspath_dir)
                             self.print_import(fp, modname)
+                self.source = fp.getvalue()
 
         else:
             assert target.is_pysource
@@ -88,23 +101,25 @@ class DummyModule(object):
             # not importable (e.g. `foo.bar.py)
             # self.fname = target.calling_fname
             self.fname = target.get_src_fname()
-            self.absname = target.package_root
+            self.pathname = target.path
             # with open(self.fname, 'w') as fp:
             #     self.print_import(fp, target.modpath)
 
         log.debug(
             "dummy-filename: %r (%s)[module=%s, dir=%s, file=%s]",
-            self.fname, self.absname, target.is_module, target.is_dir, target.is_pysource
+            self.fname, self.pathname, target.is_module, target.is_dir, target.is_pysource
         )
 
     def text(self):
         """Return the content of the dummy module.
         """
-        log.debug("Getting text from %r", self.fname)
+        if self.source is not None:
+            return self.source
+        log.debug("Getting text from %r", self.pathname)
         # log.debug("sys.path: %r", sys.path)
-        if self.fname.endswith('.pyc') or self.fname.endswith('.pyo'):
+        if self.pathname.endswith('.pyc') or self.pathname.endswith('.pyo'):
             return '<pyc file, no text>'
-        with open(self.fname) as fp:
+        with open(self.pathname) as fp:
             return fp.read()
 
     def legal_module_name(self, name):
@@ -0,0 +1,239 @@
+"""
+Finding the import statements in Python source code.
+
+An extractor takes the source of a module (``str`` or ``bytes``) and returns
+a list of ``(what, args)`` tuples, with the same meaning as the tuples the
+stdlib's ``ModuleFinder.scan_opcodes`` generates::
+
+    ("absolute_import", (fromlist, name))
+    ("relative_import", (level, fromlist, name))
+    ("store", (name,))
+
+The ``bytecode`` extractor compiles the source and scans the resulting
+bytecode (this is what modulefinder does). The ``ast`` extractor only parses
+the source, and the ``tokenize`` extractor only looks at the tokens of the
+``import`` and ``from`` statements, which is much faster for large modules
+(e.g. generated ``_pb2`` files).
+
+The ``ast`` and ``tokenize`` extractors don't report ``store`` tuples (which
+are only used to find the names imported by ``from foo import *``), they
+don't check that the rest of the module is valid Python, and ``tokenize``
+also reports imports in dead code that the compiler removes (e.g. below
+``if 0:``).
+"""
+import ast
+import dis
+import io
+import re
+import tokenize
+
+
+def scan_opcodes(co):
+    """Scan the code, and yield 'interesting' opcode combinations
+       (the same as the stdlib's ``ModuleFinder.scan_opcodes``).
+    """
+    for name in dis._find_store_names(co):
+        yield "store", (name,)
+    for name, level, fromlist in dis._find_imports(co):
+        if level == 0:  # absolute import
+            yield "absolute_import", (fromlist, name)
+        else:  # relative import
+            yield "relative_import", (level, fromlist, name)
+
+
+def code_imports(co):
+    """Return a list of the ``(what, args)`` tuples that ``scan_opcodes``
+       yields for ``co`` and all code objects nested inside it (in the order
+       ``ModuleFinder.scan_code`` would visit them).
+    """
+    res = list(scan_opcodes(co))
+    for c in co.co_consts:
+        if isinstance(c, type(co)):
+            res += code_imports(c)
+    return res
+
+
+def _import_event(level, fromlist, name):
+    if level == 0:
+        return "absolute_import", (fromlist, name)
+    return "relative_import", (level, fromlist, name)
+
+
+def bytecode_imports(source, pathname):
+    """Compile ``source`` and scan the bytecode.
+    """
+    if isinstance(source, bytes):
+        source += b'\n'
+    else:
+        source += '\n'
+    co = compile(
+        source,
+        pathname,
+        'exec',            # compile code block
+        dont_inherit=True  # [pydeps] don't inherit future statements from current environment
+    )
+    return code_imports(co)
+
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _constant_test(test):
+    """Return the truth value of an ``if`` test the compiler can evaluate
+       (``if 0:``, ``if not __debug__:``, ..), or None.
+    """
+    if isinstance(test, ast.Constant):
+        return bool(test.value)
+    if isinstance(test, ast.Name) and test.id == '__debug__':
+        return True
+    if isinstance(test, ast.UnaryOp) and isinstance(test.op, ast.Not):
+        val = _constant_test(test.operand)
+        return None if val is None else not val
+    return None
+
+
+_BODIES = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def _scope_imports(scope, res):
+    # Visit the statements of this scope in order, and then the nested
+    # scopes (functions and classes), like code_imports() visits nested
+    # code objects. Import statements can only be found in statement
+    # bodies, so there is no need to look at any expressions.
+    nested = []
+    stack = list(scope.body)[::-1]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                res.append(_import_event(0, None, alias.name))
+        elif isinstance(node, ast.ImportFrom):
+            fromlist = tuple(alias.name for alias in node.names)
+            res.append(_import_event(node.level, fromlist, node.module or ''))
+        elif isinstance(node, _SCOPES):
+            nested.append(node)
+        elif isinstance(node, ast.If) and _constant_test(node.test) is not None:
+            # the compiler removes the branch that is never taken
+            stack += (node.body if _constant_test(node.test) else node.orelse)[::-1]
+        else:
+            for field in _BODIES[::-1]:
+                stack += getattr(node, field, [])[::-1]
+    for node in nested:
+        _scope_imports(node, res)
+    return res
+
+
+def ast_imports(source, pathname):
+    """Parse ``source`` and find the import statements in the syntax tree.
+    """
+    return _scope_imports(ast.parse(source, pathname), [])
+
+
+# Skips strings and comments, and finds the keyword that starts an import
+# statement (at the start of a line, or after a ; or :). String prefixes
+# can be ignored, since a backslash escapes the quote in raw strings too.
+_IMPORT_STATEMENT = re.compile(r"""
+      \'\'\'(?:\\.|.)*?\'\'\'
+    | \"\"\"(?:\\.|.)*?\"\"\"
+    | '(?:\\.|[^\\'\n])*'
+    | "(?:\\.|[^\\"\n])*"
+    | \#[^\n]*
+    | (?:^|(?<=[;:]))[ \t]*(?P<keyword>import|from)(?=[ \t\\(.])
+""", re.VERBOSE | re.MULTILINE | re.DOTALL)
+
+
+def _parse_import(tokens):
+    """Convert the tokens of an import statement to import tuples.
+    """
+    words = [t.string for t in tokens if t.string not in ('(', ')')]
+    if words[0] == 'import':
+        # import <dotted.name> [as <name>], ...
+        res = []
+        name = ''
+        alias = False
+        for word in words[1:] + [',']:
+            if word == ',':
+                res.append(_import_event(0, None, name))
+                name = ''
+                alias = False
+            elif word == 'as':
+                alias = True
+            elif not alias:
+                name += word
+        return res
+
+    # from <dots><module> import <names>
+    level = 0
+    pos = 1
+    while words[pos] in ('.', '...'):
+        level += len(words[pos])
+        pos += 1
+    module = []
+    while words[pos] != 'import':
+        module.append(words[pos])
+        pos += 1
+    fromlist = []
+    expect_name = True
+    for word in words[pos + 1:]:
+        if word == ',':
+            expect_name = True
+        elif expect_name:
+            fromlist.append(word)
+            expect_name = False
+    return [_import_event(level, tuple(fromlist), ''.join(module))]
+
+
+def _statement_imports(source, start):
+    """Tokenize the import statement starting at ``source[start]``.
+    """
+    pos = start
+
+    def readline():
+        nonlocal pos
+        end = source.find('\n', pos) + 1 or len(source)
+        line = source[pos:end]
+        pos = end
+        return line
+
+    statement = []
+    try:
+        for tok in tokenize.generate_tokens(readline):
+            if tok.type in (tokenize.NEWLINE, tokenize.ENDMARKER) or tok.string == ';':
+                break
+            if tok.type not in (tokenize.COMMENT, tokenize.NL):
+                statement.append(tok)
+        return _parse_import(statement)
+    except (tokenize.TokenError, IndexError):
+        # not an import statement after all (e.g. `from` at the start of a
+        # continuation line in `yield \\ from x`), modulefinder wouldn't
+        # see any imports here either.
+        return []
+
+
+def tokenize_imports(source, pathname):
+    """Find and tokenize the import statements in ``source`` (strings and
+       comments are skipped, and the rest of the code isn't looked at).
+    """
+    if isinstance(source, bytes):
+        try:
+            encoding = tokenize.detect_encoding(io.BytesIO(source).readline)[0]
+            source = source.decode(encoding)
+        except (SyntaxError, UnicodeDecodeError) as e:
+            raise SyntaxError("%s: %s" % (pathname, e))
+    res = []
+    pos = 0
+    while True:
+        m = _IMPORT_STATEMENT.search(source, pos)
+        if m is None:
+            return res
+        pos = m.end()
+        if m.group('keyword'):
+            res += _statement_imports(source, m.start('keyword'))
+
+
+#: extractor name -> function(source, pathname)
+EXTRACTORS = {
+    'bytecode': bytecode_imports,
+    'ast': ast_imports,
+    'tokenize': tokenize_imports,
+}
@@ -0,0 +1,347 @@
+"""
+Builtin renderer (``--renderer builtin`` or ``-T html``), which lays out the
+graph in-process instead of calling graphviz' dot.
+
+The modules are placed in layers by their bacon distance (the number of
+imports between them and the target), and the modules in each layer are
+ordered with the barycenter heuristic (each module is moved towards the
+average position of its neighbours in the adjacent layer). Every step is
+linear in the number of edges (plus sorting the layers), so this handles
+graphs that dot can't lay out in reasonable time -- the result just isn't
+as pretty.
+"""
+import html
+import sys
+from collections import defaultdict
+
+from . import cli
+from .depgraph2dot import PyDepGraphDot
+from .render_context import Rankdir, RenderBuffer
+
+#: output formats the builtin renderer can create
+FORMATS = ('svg', 'html')
+
+CHAR_WIDTH = 6      # approximate width of a character (Helvetica 10pt)
+LINE_HEIGHT = 13
+NODE_PAD = 8        # space between the label and the border of a node
+NODE_GAP = 16       # space between the nodes in a layer
+LAYER_GAP = 56      # space between the layers
+MARGIN = 16
+SWEEPS = 4          # number of barycenter passes (alternating direction)
+
+
+def builtin_renderer(fmt, renderer=None):
+    """Return True if the graph should be rendered by the builtin renderer
+       (``renderer == 'builtin'``, or html output).
+
+       Raises RuntimeError if the builtin renderer can't create all the
+       (comma separated) formats in ``fmt``.
+    """
+    formats = [f.strip() for f in fmt.split(',') if f.strip()]
+    if renderer != 'builtin' and 'html' not in formats:
+        return False
+    unsupported = [f for f in formats if f not in FORMATS]
+    if unsupported:
+        raise RuntimeError(
+            "the builtin renderer can't create {} files (only svg and html)".format(
+                ', '.join(unsupported)))
+    return True
+
+
+class Node(object):
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        label = attrs.get('label', name)
+        self.lines = label.replace('\\.', '.').split('\\n')
+        self.width = max(len(line) for line in self.lines) * CHAR_WIDTH + 2 * NODE_PAD
+        self.height = len(self.lines) * LINE_HEIGHT + NODE_PAD
+        self.x = self.y = 0
+
+
+class LayoutBuffer(RenderBuffer):
+    """Collects the nodes and rules like :class:`RenderBuffer` (including
+       the cluster triage), but :meth:`text` lays out the graph and returns
+       svg instead of dot source.
+    """
+    def __init__(self, target, depgraph, **kw):
+        super(LayoutBuffer, self).__init__(target, **kw)
+        self.depgraph = depgraph
+
+    def _layers(self, nodes, edges):
+        """Return the layer of each node (a sortable tuple).
+
+           The nodes are layered by their bacon distance (collapsed cluster
+           nodes get the smallest bacon distance of their modules), and the
+           nodes with the same bacon distance by the longest path to them
+           along the edges between them.
+        """
+        cluster_bacon = {}
+        for src in self.depgraph.sources.values():
+            cid = self._clusterid(src.name)
+            cluster_bacon[cid] = min(cluster_bacon.get(cid, sys.maxsize), src.bacon)
+        bacon = {}
+        for name in nodes:
+            src = self.depgraph.sources.get(name)
+            bacon[name] = src.bacon if src is not None else cluster_bacon.get(name, sys.maxsize)
+        top = max((b for b in bacon.values() if b < sys.maxsize), default=0) + 1
+        # the tail of an edge is placed in a layer before its head (like dot
+        # does), the imported module is the tail unless --reverse.
+        major = {
+            name: min(b, top) if self.reverse else top - min(b, top)
+            for name, b in bacon.items()
+        }
+
+        # longest paths (Kahn's algorithm), when only cycles are left the
+        # first remaining node is released.
+        succ = defaultdict(list)
+        indegree = dict.fromkeys(nodes, 0)
+        for a, b in edges:
+            if major[a] == major[b]:
+                succ[a].append(b)
+                indegree[b] += 1
+        depth = dict.fromkeys(nodes, 0)
+        remaining = sorted(nodes, key=str.lower)
+        ready = [n for n in remaining if not indegree[n]]
+        done = set()
+        i = 0
+        while len(done) < len(nodes):
+            if not ready:
+                while remaining[i] in done:
+                    i += 1
+                ready.append(remaining[i])
+            n = ready.pop()
+            if n in done:
+                continue
+            done.add(n)
+            for m in succ[n]:
+                if m in done:
+                    continue
+                depth[m] = max(depth[m], depth[n] + 1)
+                indegree[m] -= 1
+                if not indegree[m]:
+                    ready.append(m)
+        return {name: (major[name], depth[name]) for name in nodes}
+
+    def layout(self):
+        """Return the nodes (with coordinates) and the edges of the graph.
+        """
+        if self.cluster:
+            self.triage_clusters()
+        nodes = {}
+        for name, attrs in self.nodes:
+            nodes[name] = Node(name, attrs)
+        for members in self.clusters.values():
+            for name, attrs in members:
+                nodes[name] = Node(name, attrs)
+        edges = []
+        for a, b in sorted(self.rules, key=lambda x: (x[0].lower(), x[1].lower())):
+            if a == b:
+                continue
+            for n in (a, b):
+                if n not in nodes:     # e.g. only part of a cycle
+                    nodes[n] = Node(n, {})
+            edges.append((b, a) if self.reverse else (a, b))
+
+        rank = self._layers(nodes, edges)
+        bylayer = defaultdict(list)
+        for name in sorted(nodes, key=str.lower):
+            bylayer[rank[name]].append(name)
+        layers = [bylayer[r] for r in sorted(bylayer)]
+        level = {name: i for i, layer in enumerate(layers) for name in layer}
+        position = {name: j for layer in layers for j, name in enumerate(layer)}
+        neighbours = defaultdict(list)
+        for a, b in edges:
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+
+        for sweep in range(SWEEPS):
+            if sweep % 2 == 0:
+                order, adjacent = range(1, len(layers)), -1
+            else:
+                order, adjacent = range(len(layers) - 2, -1, -1), 1
+            for i in order:
+                def barycenter(name):
+                    ps = [position[n] for n in neighbours[name] if level[n] == i + adjacent]
+                    return sum(ps) / len(ps) if ps else position[name]
+                layers[i].sort(key=barycenter)
+                for j, name in enumerate(layers[i]):
+                    position[name] = j
+
+        self._place([[nodes[name] for name in layer] for layer in layers])
+        return nodes, edges
+
+    def _place(self, layers):
+        """Set the coordinates (of the center) of the nodes.
+        """
+        vertical = self.rankdir in (Rankdir.TOP_BOTTOM, Rankdir.BOTTOM_TOP)
+
+        def along(n):
+            return n.width if vertical else n.height
+
+        def across(n):
+            return n.height if vertical else n.width
+
+        lengths = [sum(along(n) for n in layer) + NODE_GAP * (len(layer) - 1) for layer in layers]
+        longest = max(lengths, default=0)
+        offset = 0
+        for layer, length in zip(layers, lengths):
+            thickness = max(across(n) for n in layer)
+            pos = (longest - length) / 2
+            for n in layer:
+                a, c = pos + along(n) / 2, offset + thickness / 2
+                n.x, n.y = (a, c) if vertical else (c, a)
+                pos += along(n) + NODE_GAP
+            offset += thickness + LAYER_GAP
+        self.size = (longest, offset - LAYER_GAP) if vertical else (offset - LAYER_GAP, longest)
+        flip = self.rankdir in (Rankdir.BOTTOM_TOP, Rankdir.RIGHT_LEFT)
+        for layer in layers:
+            for n in layer:
+                if flip and vertical:
+                    n.y = self.size[1] - n.y
+                elif flip:
+                    n.x = self.size[0] - n.x
+                n.x += MARGIN
+                n.y += MARGIN
+
+    def _edge_path(self, a, b):
+        vertical = self.rankdir in (Rankdir.TOP_BOTTOM, Rankdir.BOTTOM_TOP)
+        if vertical:
+            (a1, c1, h1), (a2, c2, h2) = (a.x, a.y, a.height / 2), (b.x, b.y, b.height / 2)
+        else:
+            (a1, c1, h1), (a2, c2, h2) = (a.y, a.x, a.width / 2), (b.y, b.x, b.width / 2)
+        if c1 == c2:     # same layer, arc outside the layer
+            bend = -(h1 + LAYER_GAP / 2)
+            c1 -= h1
+            c2 -= h2
+            points = [(a1, c1), (a1, c1 + bend), (a2, c2 + bend), (a2, c2)]
+        else:
+            sign = 1 if c2 > c1 else -1
+            c1 += sign * h1
+            c2 -= sign * h2
+            mid = (c1 + c2) / 2
+            points = [(a1, c1), (a1, mid), (a2, mid), (a2, c2)]
+        if not vertical:
+            points = [(c, a) for a, c in points]
+        (x1, y1), (x2, y2), (x3, y3), (x4, y4) = points
+        return 'M%.1f,%.1fC%.1f,%.1f %.1f,%.1f %.1f,%.1f' % (x1, y1, x2, y2, x3, y3, x4, y4)
+
+    def text(self):
+        nodes, edges = self.layout()
+        width, height = self.size[0] + 2 * MARGIN, self.size[1] + 2 * MARGIN
+        esc = html.escape
+        out = [
+            '<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" viewBox="0 0 %d %d" '
+            'font-family="Helvetica,Arial,sans-serif" font-size="10">' % (width, height, width, height),
+            '<title>%s</title>' % esc(self.target.modpath),
+            '<style>.edge>path:hover{stroke-width:8}</style>',
+            '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="7" '
+            'markerHeight="7" orient="auto"><path d="M0,0L10,5L0,10z"/></marker></defs>',
+        ]
+        for a, b in edges:
+            out.append(
+                '<g class="edge" data-from="%s" data-to="%s"><title>%s&#45;&gt;%s</title>'
+                '<path d="%s" fill="none" stroke="#000000" marker-end="url(#arrow)"/></g>' % (
+                    esc(a), esc(b), esc(a), esc(b), self._edge_path(nodes[a], nodes[b])))
+        for name in sorted(nodes, key=str.lower):
+            n = nodes[name]
+            shape = n.attrs.get('shape')
+            out.append(
+                '<g class="node" data-name="%s"><title>%s</title>'
+                '<rect x="%.1f" y="%.1f" width="%d" height="%d" rx="%.1f" fill="%s" stroke="#000000"%s/>' % (
+                    esc(name), esc(name),
+                    n.x - n.width / 2, n.y - n.height / 2, n.width, n.height,
+                    0 if shape == 'box' else 3 if shape == 'folder' else n.height / 2,
+                    esc(n.attrs.get('fillcolor', '#ffffff')),
+                    ' stroke-width="2"' if shape == 'folder' else ''))
+            top = n.y - (len(n.lines) - 1) * LINE_HEIGHT / 2 + 3.5
+            for i, line in enumerate(n.lines):
+                out.append('<text x="%.1f" y="%.1f" text-anchor="middle" fill="%s">%s</text>' % (
+                    n.x, top + i * LINE_HEIGHT, esc(n.attrs.get('fontcolor', '#000000')), esc(line)))
+            out.append('</g>')
+        out.append('</svg>')
+        return '\n'.join(out) + '\n'
+
+
+HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<style>
+body {margin: 0; font-family: Helvetica, Arial, sans-serif; font-size: 13px}
+#bar {position: fixed; top: 0; left: 0; right: 0; padding: 6px 8px; background: #eeeeee; border-bottom: 1px solid #cccccc}
+#graph {margin-top: 36px}
+#graph .node {cursor: pointer}
+#graph .dim {opacity: 0.12}
+</style>
+</head>
+<body>
+<div id="bar"><input id="search" placeholder="find module" size="30">
+click a module to show only its imports, click it again (or press Esc) to show everything</div>
+<div id="graph">
+%(svg)s</div>
+<script>
+(function () {
+    var nodes = {}, selected = null;
+    var all = document.querySelectorAll('#graph .node, #graph .edge');
+    document.querySelectorAll('#graph .node').forEach(function (el) {
+        nodes[el.dataset.name] = {el: el, edges: [], neighbours: []};
+        el.addEventListener('click', function () { select(el.dataset.name); });
+    });
+    document.querySelectorAll('#graph .edge').forEach(function (el) {
+        var a = nodes[el.dataset.from], b = nodes[el.dataset.to];
+        a.edges.push(el); b.edges.push(el);
+        a.neighbours.push(b); b.neighbours.push(a);
+    });
+    function reset() {
+        selected = null;
+        all.forEach(function (el) { el.classList.remove('dim'); });
+    }
+    function select(name) {
+        if (selected === name) { return reset(); }
+        selected = name;
+        all.forEach(function (el) { el.classList.add('dim'); });
+        var node = nodes[name];
+        [node].concat(node.neighbours).forEach(function (n) { n.el.classList.remove('dim'); });
+        node.edges.forEach(function (el) { el.classList.remove('dim'); });
+    }
+    document.addEventListener('keydown', function (e) { if (e.key === 'Escape') { reset(); } });
+    document.getElementById('search').addEventListener('change', function (e) {
+        var text = e.target.value.toLowerCase();
+        for (var name in nodes) {
+            if (name.toLowerCase().indexOf(text) >= 0) {
+                nodes[name].el.scrollIntoView({block: 'center', inline: 'center'});
+                selected = null;
+                return select(name);
+            }
+        }
+    });
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def svg2html(svg, title):
+    """Return an html page with the ``svg`` graph, where clicking a module
+       highlights its imports.
+    """
+    return HTML % dict(title=html.escape(title), svg=svg)
+
+
+def render(target, depgraph, outputs, **kw):
+    """Lay out ``depgraph`` and write it to the ``(format, filename)``
+       pairs in ``outputs`` (the formats must be in :data:`FORMATS`).
+    """
+    ctx = LayoutBuffer(target, depgraph, **kw)
+    svg = PyDepGraphDot(**kw).render(depgraph, ctx)
+    for fmt, output in outputs:
+        text = svg2html(svg, target.modpath) if fmt == 'html' else svg
+        try:
+            with open(output, 'w', encoding='utf-8') as fp:
+                cli.verbose("Writing output to:", output)
+                fp.write(text)
+        except OSError as cause:
+            raise RuntimeError("While writing {!r}: {}".format(output, cause))
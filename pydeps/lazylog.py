@@ -0,0 +1,64 @@
+"""
+Lazily computed log message arguments.
+
+Arguments to ``log.info(msg, *args)`` are evaluated by the caller, even when
+the message is never emitted. Wrapping expensive arguments (e.g. the whole
+dependency graph serialized as json) in :class:`lazy` defers the work until
+a handler actually formats the record::
+
+    log.info("depgraph:\\n%s", lazylog.json_dump(depgraph))
+
+"""
+import json
+
+
+class lazy(object):
+    """``str(lazy(fn, *args, **kwargs))`` is ``str(fn(*args, **kwargs))``,
+       but ``fn`` isn't called until then (and only once, even if several
+       handlers format the record).
+    """
+    __slots__ = ('fn', 'args', 'kwargs', '_value')
+
+    def __init__(self, fn, *args, **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def value(self):
+        try:
+            return self._value
+        except AttributeError:
+            self._value = self.fn(*self.args, **self.kwargs)
+            return self._value
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+def _json_dump(obj):
+    return json.dumps(dict(obj), indent=4)
+
+
+def _yaml_dump(obj):
+    try:
+        import yaml
+    except ImportError:
+        return _json_dump(obj)
+    return yaml.dump(dict(obj), default_flow_style=False)
+
+
+def json_dump(obj):
+    """The mapping ``obj`` as indented json (when formatted).
+    """
+    return lazy(_json_dump, obj)
+
+
+def yaml_dump(obj):
+    """The mapping ``obj`` as yaml (json if yaml isn't installed), when
+       formatted.
+    """
+    return lazy(_yaml_dump, obj)
@@ -0,0 +1,103 @@
+"""
+Matching module names against exclude patterns.
+"""
+import fnmatch
+import re
+
+_WILDCARDS = re.compile(r'[*?\[]')
+
+
+def combined_regex(patterns):
+    """Compile the fnmatch ``patterns`` to one regular expression that
+       matches a name if any of the patterns match (all of the name), or
+       None if there are no patterns.
+    """
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns))
+
+
+class PrefixTrie(object):
+    """A trie of dotted module names, used for ``foo.bar.*`` patterns.
+
+       A name matches if it starts with one of the prefixes followed by a
+       dot (which is what ``fnmatch`` does for ``foo.bar.*``).
+    """
+    def __init__(self, prefixes=()):
+        self.root = {}
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix):
+        node = self.root
+        for part in prefix.split('.'):
+            node = node.setdefault(part, {})
+        node[None] = True   # end of a prefix
+
+    def __bool__(self):
+        return bool(self.root)
+
+    def match(self, name):
+        node = self.root
+        parts = name.split('.')
+        for part in parts[:-1]:
+            node = node.get(part)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+
+class PatternMatcher(object):
+    """Match module names against fnmatch patterns (e.g. ``foo.*``) and a
+       set of exact names.
+
+       Patterns without wildcards are exact names, ``foo.bar.*`` patterns
+       go into a :class:`PrefixTrie`, and only the rest are matched with a
+       (single, combined) regex. The cost of matching a name therefore
+       doesn't grow with the number of these simple patterns. Exact names
+       can be added at any time (:meth:`add`) without recompiling
+       anything, and both positive and negative results are cached.
+    """
+    def __init__(self, patterns=(), names=()):
+        self.patterns = list(patterns)
+        self.names = set(names)
+        self.prefixes = PrefixTrie()
+        regex_patterns = []
+        for pattern in self.patterns:
+            if not _WILDCARDS.search(pattern):
+                self.names.add(pattern)
+            elif pattern.endswith('.*') and not _WILDCARDS.search(pattern[:-2]):
+                self.prefixes.add(pattern[:-2])
+            else:
+                regex_patterns.append(pattern)
+        self._regex = combined_regex(regex_patterns)
+        self._excluded = set()  # names that match
+        self._included = set()  # names that don't match
+        #: number of names matched against the regex (i.e. not answered by
+        #: the caches, the exact names or the prefixes)
+        self.regex_calls = 0
+
+    def add(self, name):
+        """Add the exact module name ``name``.
+        """
+        self.names.add(name)
+        self._included.discard(name)
+        self._excluded.add(name)
+
+    def __call__(self, name):
+        if name in self._excluded:
+            return True
+        if name in self._included:
+            return False
+        if name in self.names or (self.prefixes and self.prefixes.match(name)):
+            self._excluded.add(name)
+            return True
+        if self._regex is not None:
+            self.regex_calls += 1
+            if self._regex.match(name) is not None:
+                self._excluded.add(name)
+                return True
+        self._included.add(name)
+        return False
@@ -2,12 +2,14 @@ import marshal
 import struct
 import sys
 import modulefinder
+from concurrent.futures import ProcessPoolExecutor
 from importlib.util import MAGIC_NUMBER
 from modulefinder import (
     ModuleFinder as NativeModuleFinder
 )
 import dis
 from . import mfimp
+from .extractors import EXTRACTORS, code_imports, scan_opcodes  # noqa: F401
 
 HAVE_ARGUMENT = dis.HAVE_ARGUMENT
 
@@ -61,7 +63,50 @@ def load_pyc(fp, mf=None):
     return co
 
 
+def scan_file(pathname, kind, extractor='bytecode'):
+    """Return the list of imports in the file ``pathname`` (see
+       :func:`code_imports`), or None if it can't be compiled.
+
+       This is a top-level function so it can run in a worker process.
+    """
+    try:
+        with open(pathname, 'rb') as fp:
+            if kind == _PY_COMPILED:
+                return code_imports(load_pyc(fp))
+            return EXTRACTORS[extractor](fp.read(), pathname)
+    except (OSError, ImportError, SyntaxError, ValueError):
+        return None
+
+
 class ModuleFinder(NativeModuleFinder):
+    def __init__(self, path=None, debug=0, excludes=None, replace_paths=None, scan_cache=None,
+                 extractor='bytecode', path_cache=None):
+        NativeModuleFinder.__init__(self, path, debug, excludes, replace_paths)
+        #: directory listings and module lookups (a :class:`pydeps.mfimp.PathCache`),
+        #: only shared with other module finders if it is passed in.
+        self.path_cache = path_cache if path_cache is not None else mfimp.PathCache()
+        #: how to find the imports in source files (a key in ``EXTRACTORS``),
+        #: .pyc files are always scanned by looking at the bytecode.
+        self.extractor = extractor
+        #: pathname -> list of (what, args) found when scanning that file.
+        self.scanned = {}
+        #: persistent cache for ``self.scanned`` (a :class:`pydeps.cache.ScanCache`)
+        self.scan_cache = scan_cache
+        #: number of files compiled (or parsed by the extractor)
+        self.compiled = 0
+
+    def find_module(self, name, path, parent=None):
+        # overridden to look up modules in self.path_cache
+        fullname = parent.__name__ + '.' + name if parent is not None else name
+        if fullname in self.excludes:
+            self.msgout(3, "find_module -> Excluded", fullname)
+            raise ImportError(name)
+        if path is None:
+            if name in sys.builtin_module_names:
+                return (None, None, ("", "", mfimp.C_BUILTIN))
+            path = self.path
+        return mfimp.find_module(name, path, self.path_cache)
+
     def import_hook(self, name, caller=None, fromlist=None, level=-1):
         self.msg(3, "import_hook: name(%s) caller(%s) fromlist(%s) level(%s)" % (name, caller, fromlist, level))
         parent = self.determine_parent(caller, level=level)
@@ -100,9 +145,20 @@ class ModuleFinder(NativeModuleFinder):
             self.msgout(2, "load_module ->", m)
             return m
 
-        if kind == _PY_SOURCE:
+        co = None
+        # there is no need to compile files we've scanned before.
+        imports = self._cached_imports(pathname) if kind in (_PY_SOURCE, _PY_COMPILED) else None
+
+        if imports is None and kind == _PY_SOURCE and self.extractor != 'bytecode':
+            # find the imports without compiling the module
+            self.compiled += 1
+            imports = EXTRACTORS[self.extractor](fp.read(), pathname)
+            self._store_imports(pathname, imports)
+
+        elif imports is None and kind == _PY_SOURCE:
             txt = fp.read()
             txt += b'\n' if isinstance(txt, bytes) else '\n'
+            self.compiled += 1
             co = compile(
                 txt,
                 pathname,
@@ -110,7 +166,7 @@ class ModuleFinder(NativeModuleFinder):
                 dont_inherit=True  # [pydeps] don't inherit future statements from current environment
             )
 
-        elif kind == _PY_COMPILED:
+        elif imports is None and kind == _PY_COMPILED:
             # (see issue #191)
             try:
                 co = load_pyc(fp, self)
@@ -149,28 +205,141 @@ class ModuleFinder(NativeModuleFinder):
             #     # print("pysize %s (%d)" % (binascii.hexlify(size), struct.unpack('<L', size)[0]))
             # co = marshal.load(fp)
 
-        else:
-            co = None
         m = self.add_module(fqname)
         m.__file__ = pathname
         if co:
             if self.replace_paths:
                 co = self.replace_paths_in_code(co)
             m.__code__ = co
-            self.scan_code(co, m)
+            imports = code_imports(co)
+            self._store_imports(pathname, imports)
+        if imports is not None:
+            self.scan_imports(imports, m)
         self.msgout(2, "load_module ->", m)
         return m
 
+    def _cached_imports(self, pathname):
+        """Return the imports found in ``pathname`` the last time we scanned
+           it (if it hasn't changed since), or None.
+        """
+        imports = self.scanned.get(pathname)
+        if imports is None and self.scan_cache is not None:
+            imports = self.scan_cache.get_imports(pathname)
+            if imports is not None:
+                self.scanned[pathname] = imports
+        return imports
+
+    def _store_imports(self, pathname, imports):
+        self.scanned[pathname] = imports
+        if self.scan_cache is not None:
+            self.scan_cache.put_imports(pathname, imports)
+
+    def prefetch(self, pathname, jobs, source=None):
+        """Scan ``pathname``, and the files it will (probably) import, using
+           ``jobs`` worker processes. If ``source`` is given, it is the text
+           of ``pathname`` (which doesn't need to exist).
+
+           The files are found by looking up the imports in each wave of
+           scanned files, to find the next wave. This is only a guess at what
+           ``load_module`` will need (it is still ``import_hook`` that decides
+           what is imported), but it means ``load_module`` will find almost
+           all files in ``self.scanned`` and won't have to compile them.
+        """
+        seen = {pathname}
+        if source is not None:
+            self.compiled += 1
+            self.scanned[pathname] = EXTRACTORS[self.extractor](source.encode('utf-8'), pathname)
+        wave = [('__main__', False, pathname, _PY_COMPILED if pathname.endswith(('.pyc', '.pyo')) else _PY_SOURCE)]
+        located = {}
+        with ProcessPoolExecutor(jobs) as pool:
+            while wave:
+                todo = [(fname, kind) for _name, _ispkg, fname, kind in wave
+                        if self._cached_imports(fname) is None]
+                self.msg(2, "prefetch: scanning %d files" % len(todo))
+                chunksize = max(1, len(todo) // (4 * jobs))
+                results = pool.map(
+                    scan_file, *zip(*todo), [self.extractor] * len(todo), chunksize=chunksize
+                ) if todo else []
+                for (fname, _kind), imports in zip(todo, results):
+                    if imports is not None:
+                        self.compiled += 1
+                        self._store_imports(fname, imports)
+
+                nextwave = []
+                for modname, ispkg, fname, _kind in wave:
+                    for name in self._imported_names(modname, ispkg, self.scanned.get(fname, ())):
+                        for item in self._locate(name, located):
+                            if item[2] not in seen:
+                                seen.add(item[2])
+                                nextwave.append(item)
+                wave = nextwave
+
+    def _imported_names(self, modname, ispkg, imports):
+        """The names of the modules ``imports`` (found in module ``modname``)
+           can import.
+        """
+        package = modname if ispkg else modname.rpartition('.')[0]
+        for what, args in imports:
+            if what == "absolute_import":
+                fromlist, name = args
+            elif what == "relative_import" and modname != '__main__':
+                level, fromlist, name = args
+                parts = package.split('.')[:len(package.split('.')) - (level - 1)]
+                name = '.'.join(parts + [name]) if name else '.'.join(parts)
+            else:
+                continue
+            if not name:
+                continue
+            yield name
+            for sub in fromlist or ():
+                if sub != '*':
+                    yield name + '.' + sub
+
+    def _locate(self, name, located):
+        """Return ``(modname, ispkg, pathname, kind)`` for the Python files
+           that are loaded by importing ``name`` (i.e. the file for each
+           component of the dotted name).
+
+           ``located`` caches the results, module name -> (item, __path__).
+        """
+        res = []
+        path = self.path
+        fqname = ''
+        for part in name.split('.'):
+            fqname = fqname + '.' + part if fqname else part
+            if fqname not in located:
+                located[fqname] = None
+                if path is not None and fqname not in self.excludes:
+                    try:
+                        pathname, (_suffix, _mode, kind) = mfimp.locate_module(part, path, self.path_cache)
+                    except ImportError:
+                        pathname, kind = None, None
+                    if kind == _PKG_DIRECTORY:
+                        try:
+                            init, (_suffix, _mode, kind) = mfimp.locate_module('__init__', [pathname], self.path_cache)
+                        except ImportError:
+                            init, kind = None, None
+                        item = (fqname, True, init, kind) if kind in (_PY_SOURCE, _PY_COMPILED) else None
+                        located[fqname] = (item, [pathname])
+                    elif kind == _NAMESPACE_PACKAGE:
+                        located[fqname] = (None, [pathname])
+                    elif kind in (_PY_SOURCE, _PY_COMPILED):
+                        located[fqname] = ((fqname, False, pathname, kind), None)
+            if located[fqname] is None:
+                break
+            item, path = located[fqname]
+            if item is not None:
+                res.append(item)
+        return res
+
     def scan_code(self, co, m):
-        code = co.co_code   # noqa
-        # if sys.version_info >= (3, 4):
-        #     scanner = self.scan_opcodes
-        # elif sys.version_info >= (2, 5):
-        #     scanner = self.scan_opcodes_25
-        # else:
-        #     scanner = self.scan_opcodes_24
-        scanner = self.scan_opcodes
-        for what, args in scanner(co):
+        self.scan_imports(code_imports(co), m)
+
+    def scan_imports(self, imports, m):
+        """Process the ``(what, args)`` tuples found by scanning the code of
+           module ``m``.
+        """
+        for what, args in imports:
             if what == "store":
                 name, = args
                 m.globalnames[name] = 1
@@ -201,7 +370,7 @@ class ModuleFinder(NativeModuleFinder):
                     if mm is not None:
                         m.globalnames.update(mm.globalnames)
                         m.starimports.update(mm.starimports)
-                        if mm.__code__ is None:
+                        if mm.__code__ is None and mm.__file__ not in self.scanned:
                             m.starimports[name] = 1
                     else:
                         m.starimports[name] = 1
@@ -216,7 +385,3 @@ class ModuleFinder(NativeModuleFinder):
             else:
                 # We don't expect anything else from the generator.
                 raise RuntimeError(what)
-
-        for c in co.co_consts:
-            if isinstance(c, type(co)):
-                self.scan_code(c, m)
@@ -35,7 +35,7 @@ def _get_suffixes():
     return extensions + source + bytecode
 
 
-def find_module(name, path=None):
+def find_module(name, path=None, cache=None):
     if not isinstance(name, str):
         raise TypeError("'name' must be a str, not {}".format(type(name)))
     elif not isinstance(path, (type(None), list)):
@@ -43,43 +43,177 @@ def find_module(name, path=None):
         raise RuntimeError("'path' must be None or a list, "
                            "not {}".format(type(path)))
 
+    file_path, (suffix, mode, type_) = locate_module(name, path, cache)
+    if type_ not in (PY_SOURCE, PY_COMPILED, C_EXTENSION):
+        return None, file_path, (suffix, mode, type_)
+
+    encoding = None
+    if 'b' not in mode:
+        with open(file_path, 'rb') as file:
+            encoding = tokenize.detect_encoding(file.readline)[0]
+    file = open(file_path, mode, encoding=encoding)
+    return file, file_path, (suffix, mode, type_)
+
+
+class PathCache(object):
+    """Remembers the contents of the directories on the module search path,
+       and the results of :func:`locate_module`.
+
+       Each directory is listed (once) with ``os.scandir``, instead of
+       checking if ``name + suffix`` exists for every suffix (and every
+       directory on the path) each time a module is looked up. Missing
+       modules are remembered too.
+
+       Directories that can change while pydeps runs can be listed in
+       ``volatile``, they (and their sub-directories) are then checked
+       every time.
+    """
+    def __init__(self, volatile=()):
+        self.reset(volatile)
+
+    def reset(self, volatile=()):
+        """Forget everything, and set the list of volatile directories.
+        """
+        self.volatile = tuple(os.path.abspath(d) for d in volatile)
+        self.clear()
+
+    def clear(self):
+        """Forget all directory listings and lookup results.
+        """
+        #: directory -> (set of file names, set of directory names)
+        self.listings = {}
+        #: (name, tuple(path)) -> result of locate_module (or ImportError)
+        self.located = {}
+        self._volatile = {}
+        self.hits = 0
+        self.misses = 0
+        #: number of times the file system was asked (directories listed,
+        #: and isfile/isdir checks in volatile directories)
+        self.stat_calls = 0
+
+    def is_volatile(self, directory):
+        """Is ``directory`` (an absolute path) below one of the volatile
+           directories?
+        """
+        try:
+            return self._volatile[directory]
+        except KeyError:
+            res = self._volatile[directory] = any(
+                directory == v or directory.startswith(v.rstrip(os.sep) + os.sep)
+                for v in self.volatile
+            )
+            return res
+
+    def listing(self, directory):
+        """Return the names of the files and the sub-directories in
+           ``directory`` (empty sets if it isn't a directory), or None if
+           the directory is volatile.
+        """
+        res = self.listings.get(directory)
+        if res is None and not os.path.isabs(directory):
+            directory = os.path.abspath(directory)
+            res = self.listings.get(directory)
+        if res is None:
+            if self.is_volatile(directory):
+                return None
+            res = (set(), set())
+            self.stat_calls += 1
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir():
+                                res[1].add(entry.name)
+                            elif entry.is_file():
+                                res[0].add(entry.name)
+                        except OSError:
+                            pass
+            except OSError:
+                pass
+            self.listings[directory] = res
+        return res
+
+    def isfile(self, directory, name):
+        listing = self.listing(directory)
+        if listing is None:
+            self.stat_calls += 1
+            return os.path.isfile(os.path.join(directory, name))
+        return name in listing[0]
+
+    def isdir(self, directory, name):
+        listing = self.listing(directory)
+        if listing is None:
+            self.stat_calls += 1
+            return os.path.isdir(os.path.join(directory, name))
+        return name in listing[1]
+
+
+#: used when no cache is passed to :func:`locate_module` (the module
+#: finders in pydeps each have their own, see
+#: :attr:`pydeps.mf27.ModuleFinder.path_cache`)
+path_cache = PathCache()
+
+
+def locate_module(name, path=None, cache=None):
+    """Find module ``name`` on ``path`` (like :func:`find_module`), without
+       opening it.
+
+       Returns ``(file_path, (suffix, mode, type))``, where file_path is the
+       directory for (namespace) packages and None for builtin and frozen
+       modules. ``cache`` is the :class:`PathCache` to use (default:
+       :data:`path_cache`).
+    """
     if path is None:
         if is_builtin(name):
-            return None, None, ('', '', C_BUILTIN)
+            return None, ('', '', C_BUILTIN)
         elif is_frozen(name):
-            return None, None, ('', '', PY_FROZEN)
+            return None, ('', '', PY_FROZEN)
         else:
             path = sys.path
 
+    if cache is None:
+        cache = path_cache
+    key = (name, tuple(path))
+    res = cache.located.get(key)
+    if res is None:
+        cache.misses += 1
+        res, cacheable = _locate_module(name, path, cache)
+        if cacheable:
+            cache.located[key] = res
+    else:
+        cache.hits += 1
+    if res is ImportError:
+        raise ImportError('No module named {!r}'.format(name), name=name)
+    return res
+
+
+def _locate_module(name, path, cache):
+    """Returns ``(result, cacheable)``, where result is ImportError if the
+       module can't be found. The result isn't cacheable if any of the
+       directories it depends on is volatile (or relative to the current
+       directory).
+    """
+    cacheable = True
     namespace_directory = None
+    suffixes = _get_suffixes()
     for entry in path:
+        cacheable = cacheable and os.path.isabs(entry) and not cache.is_volatile(entry)
         package_directory = os.path.join(entry, name)
-        for suffix in ['.py', machinery.BYTECODE_SUFFIXES[0]]:
-            package_file_name = '__init__' + suffix
-            file_path = os.path.join(package_directory, package_file_name)
-            if os.path.isfile(file_path):
-                return None, package_directory, ('', '', PKG_DIRECTORY)
-        for suffix, mode, type_ in _get_suffixes():
+        if cache.isdir(entry, name):
+            cacheable = cacheable and not cache.is_volatile(package_directory)
+            for suffix in ['.py', machinery.BYTECODE_SUFFIXES[0]]:
+                if cache.isfile(package_directory, '__init__' + suffix):
+                    return (package_directory, ('', '', PKG_DIRECTORY)), cacheable
+        for suffix, mode, type_ in suffixes:
             file_name = name + suffix
-            file_path = os.path.join(entry, file_name)
-            if os.path.isfile(file_path):
-                break
-        else:
-            # PEP 420: a directory without __init__.py is a namespace
-            # package. Remember the first match and fall back to it only if
-            # no regular module or package is found in any later entry.
-            if namespace_directory is None and os.path.isdir(package_directory):
-                namespace_directory = package_directory
-            continue
-        break  # Break out of outer loop when breaking out of inner loop.
-    else:
-        if namespace_directory is not None:
-            return None, namespace_directory, ('', '', NAMESPACE_PACKAGE)
-        raise ImportError('No module named {!r}'.format(name), name=name)
+            if cache.isfile(entry, file_name):
+                return (os.path.join(entry, file_name), (suffix, mode, type_)), cacheable
+        # PEP 420: a directory without __init__.py is a namespace
+        # package. Remember the first match and fall back to it only if
+        # no regular module or package is found in any later entry.
+        if namespace_directory is None and cache.isdir(entry, name):
+            namespace_directory = package_directory
 
-    encoding = None
-    if 'b' not in mode:
-        with open(file_path, 'rb') as file:
-            encoding = tokenize.detect_encoding(file.readline)[0]
-    file = open(file_path, mode, encoding=encoding)
-    return file, file_path, (suffix, mode, type_)
+    if namespace_directory is not None:
+        return (namespace_directory, ('', '', NAMESPACE_PACKAGE)), cacheable
+    return ImportError, cacheable
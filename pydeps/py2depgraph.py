@@ -20,22 +20,28 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import enum
-import fnmatch
+import io
 import json
 import logging
 import os
-import re
 import sys
 from collections import defaultdict
 
-from . import depgraph, mf27
+from . import depgraph, lazylog, mf27, mfimp
+from .cache import ScanCache
 from .dummymodule import DummyModule
+from .matcher import PatternMatcher
 from .pystdlib import pystdlib
+from .snapshot import read_snapshot, write_snapshot
+from .timings import Timings
 
 log = logging.getLogger(__name__)
 
 PYLIB_PATH = depgraph.PYLIB_PATH
 
+#: version of the file format written by MyModuleFinder.save_state()
+STATE_VERSION = 1
+
 
 class imp(enum.IntEnum):
     C_BUILTIN = 6
@@ -77,20 +83,12 @@ class Module(object):
         )
 
 
-class Excluder(object):
+class Excluder(PatternMatcher):
+    """Is a module name matched by one of the ``--exclude`` patterns?
+    """
     def __init__(self, excludes):
+        super(Excluder, self).__init__(excludes)
         self.excludes = excludes
-        self._excluded = set()
-        self._regexps = [re.compile(fnmatch.translate(excl)) for excl in excludes]
-
-    def __call__(self, name):
-        if name in self._excluded:
-            return True
-        for regexp in self._regexps:
-            if regexp.match(name) is not None:
-                self._excluded.add(name)
-                return True
-        return False
 
 
 class MyModuleFinder(mf27.ModuleFinder):
@@ -106,17 +104,39 @@ class MyModuleFinder(mf27.ModuleFinder):
         # self.include_pylib = kwargs.pop('pylib', self.include_pylib_all)
         self.include_pylib = kwargs.pop('pylib', self.include_pylib_all)
 
+        # number of processes used to scan files (0 -> one per cpu)
+        jobs = kwargs.get('jobs', 1)
+        self.jobs = (os.cpu_count() or 1) if jobs == 0 else (jobs or 1)
+
         self._depgraph = defaultdict(dict)
         self._types = {}
+        # all resolved imports (caller -> set of module names), including
+        # those that are filtered out of self._depgraph
+        self._imports = defaultdict(set)
         self._last_caller = None
         # path=None, debug=0, excludes=[], replace_paths=[]
 
         debug = 5 if self.verbose >= 4 else 0
+        extractor = kwargs.get('extractor') or 'bytecode'
+        scan_cache = ScanCache(kwargs.get('cache_dir'), extractor=extractor) if kwargs.get('scan_cache') else None
+        # in batch mode (pydeps.batch) modules are only located once
+        shared = kwargs.get('shared_caches')
+        path_cache = kwargs.get('path_cache')
+        if path_cache is None and shared is not None:
+            path_cache = shared.path_cache
+        elif path_cache is None:
+            path_cache = mfimp.PathCache(kwargs.get('volatile_path') or ())
         mf27.ModuleFinder.__init__(self,
                                    path=syspath,
                                    debug=debug,
                                    # debug=3,
-                                   excludes=kwargs.get('excludes', []))
+                                   excludes=kwargs.get('excludes', []),
+                                   scan_cache=scan_cache,
+                                   extractor=extractor,
+                                   path_cache=path_cache)
+        # in batch mode files are only scanned once
+        if shared is not None:
+            self.scanned = shared.scanned
 
     def add_module(self, fqname):
         if fqname in self.modules:
@@ -124,11 +144,27 @@ class MyModuleFinder(mf27.ModuleFinder):
         self.modules[fqname] = m = Module(fqname)
         return m
 
-    def run_script(self, pathname):
+    def run_script(self, pathname, source=None):
         # overridden so we can work directly with .pyc files
         # (the stdlig version hardcodes PY_SOURCE below)
+        # If ``source`` is given, it is the text of the script (which is
+        # never written to ``pathname``).
         log.debug("run_script(%r)", pathname)
         self.msg(2, "run_script", pathname)
+        if source is not None:
+            # the name of an in-memory script isn't unique (the targets of a
+            # batch share self.scanned)
+            self.scanned.pop(pathname, None)
+            try:
+                if self.jobs > 1:
+                    self.prefetch(pathname, self.jobs, source)
+                fp = io.BytesIO(source.encode('utf-8'))
+                self.load_module('__main__', fp, pathname, ("", "rb", imp.PY_SOURCE))
+            finally:
+                self.scanned.pop(pathname, None)
+            return
+        if self.jobs > 1:
+            self.prefetch(pathname, self.jobs)
         with open(pathname, 'rb') as fp:
             stuff = (
                 "",
@@ -149,6 +185,7 @@ class MyModuleFinder(mf27.ModuleFinder):
     def _add_import(self, module):
         if module is not None:
             if self._last_caller:
+                self._imports[self._last_caller.__name__].add(module.__name__)
                 # self._depgraph[self._last_caller.__name__][module.__name__] = module.__file__
                 if hasattr(module, '__file__') or self.include_pylib_all:
                     pylib_p = []
@@ -215,6 +252,142 @@ class MyModuleFinder(mf27.ModuleFinder):
                 self._add_import(getattr(module, sub))
                 # print "  SUB:", sub, "lastcaller:", self._last_caller
 
+    def save_state(self, fname, options):
+        """Save the raw dependency graph, and everything :meth:`update` needs
+           to update it incrementally, to ``fname`` (as json).
+        """
+        state = dict(
+            version=STATE_VERSION,
+            options=options,
+            modules={name: [m.__file__, m.__path__] for name, m in self.modules.items()},
+            depgraph=self._depgraph,
+            types=self._types,
+            imports={name: sorted(v) for name, v in self._imports.items()},
+            badmodules=self.badmodules,
+        )
+        with open(fname, 'w') as fp:
+            json.dump(state, fp)
+
+    def load_state(self, fname, options):
+        """Load a state saved by :meth:`save_state`.
+
+           Returns False if there is no usable state in ``fname`` (it doesn't
+           exist, or was saved by another version or with other options).
+        """
+        try:
+            with open(fname) as fp:
+                state = json.load(fp)
+        except (OSError, ValueError):
+            return False
+        if state.get('version') != STATE_VERSION or state.get('options') != options:
+            return False
+
+        for name, (file, path) in state['modules'].items():
+            m = self.add_module(name)
+            m.__file__ = file
+            m.__path__ = path
+        for name, m in self.modules.items():
+            # import_module() makes submodules attributes of their parent
+            parent, _, partname = name.rpartition('.')
+            if parent in self.modules:
+                setattr(self.modules[parent], partname, m)
+        self._depgraph.update(state['depgraph'])
+        self._types.update(state['types'])
+        for name, imports in state['imports'].items():
+            self._imports[name] = set(imports)
+        self.badmodules.update(state['badmodules'])
+        return True
+
+    def update(self, changed):
+        """Re-scan the modules whose files are in ``changed`` (a list of file
+           names), after :meth:`load_state`.
+
+           Modified files can only change their own imports, but added or
+           deleted files can change how any import is resolved. Returns
+           False if that could be the case, or if a changed file can't be
+           loaded (e.g. it has a syntax error), i.e. a full run (with a new
+           module finder) is needed.
+        """
+        suffixes = tuple(suffix for suffix, _mode, _kind in mfimp._get_suffixes())
+        by_file = {}
+        search_dirs = {os.path.realpath(p) for p in self.path}
+        for name, m in self.modules.items():
+            if m.__file__:
+                by_file[os.path.realpath(m.__file__)] = name
+            for p in m.__path__ or []:
+                search_dirs.add(os.path.realpath(p))
+
+        stale = []
+        for fname in changed:
+            fname = os.path.realpath(fname)
+            if not fname.endswith(suffixes):
+                continue
+            name = by_file.get(fname)
+            if name is None:
+                parent = os.path.dirname(fname)
+                while parent != os.path.dirname(parent):
+                    if parent in search_dirs:
+                        log.info("%s is a new file, a full run is needed", fname)
+                        return False
+                    parent = os.path.dirname(parent)
+                continue  # can't be imported by anyone
+            if not os.path.exists(fname):
+                log.info("%s has been deleted, a full run is needed", fname)
+                return False
+            stale.append(self.modules[name])
+
+        reachable = self._reachable()
+        for m in stale:
+            self._forget_imports(m.__name__)
+        for m in stale:
+            if not self._rescan(m):
+                log.info("%s can't be loaded, a full run is needed", m.__file__)
+                return False
+        # remove modules that aren't imported by anyone anymore
+        for name in reachable - self._reachable():
+            del self.modules[name]
+            self._types.pop(name, None)
+            self._forget_imports(name)
+        return True
+
+    def _reachable(self):
+        """Return the names of all modules imported (directly or indirectly)
+           by ``__main__``.
+        """
+        res = {'__main__'}
+        todo = ['__main__']
+        while todo:
+            for name in self._imports.get(todo.pop(), ()):
+                if name not in res:
+                    res.add(name)
+                    todo.append(name)
+        return res
+
+    def _forget_imports(self, name):
+        """Remove everything we know about the imports of module ``name``.
+        """
+        self._depgraph.pop(name, None)
+        self._imports.pop(name, None)
+        for badname, callers in list(self.badmodules.items()):
+            callers.pop(name, None)
+            if not callers:
+                del self.badmodules[badname]
+
+    def _rescan(self, m):
+        """Load module ``m`` again, return False if it can't be loaded
+           (e.g. it has a syntax error).
+        """
+        log.debug("re-scanning %s (%s)", m.__name__, m.__file__)
+        self.scanned.pop(m.__file__, None)
+        m.globalnames = {}
+        m.starimports = {}
+        kind = imp.PY_COMPILED if m.__file__.endswith(('.pyc', '.pyo')) else imp.PY_SOURCE
+        try:
+            with open(m.__file__, 'rb') as fp:
+                return self.load_module(m.__name__, fp, m.__file__, ('', 'rb', kind)) is not None
+        except ImportError:
+            return False
+
 
 class RawDependencies(object):
     def __init__(self, fname, **kw):
@@ -226,15 +399,138 @@ class RawDependencies(object):
         self.types = mf._types
 
 
+def _search_path(target):
+    """The module search path for ``target``: its package root followed
+       by ``sys.path``.
+
+       The module finder doesn't depend on the current directory, so
+       relative entries on ``sys.path`` (e.g. ``''``) are left out, except
+       for python source files, where they are relative to the directory
+       of the file.
+    """
+    base = os.path.dirname(target.path) if target.is_pysource else None
+    res = [target.syspath_dir]
+    for entry in sys.path:
+        if not os.path.isabs(entry):
+            if base is None:
+                continue
+            entry = os.path.normpath(os.path.join(base, entry))
+        res.append(entry)
+    return res
+
+
+def _find_modules(target, exclude, timings, kw):
+    """Run the module finder on (a dummy module importing) ``target``, and
+       return it.
+    """
+    with timings.stage('dummymodule'):
+        dummy = DummyModule(target, **kw)
+
+    kw['dummyname'] = dummy.fname
+    syspath = _search_path(target)
+
+    shared = kw.get('shared_caches')
+    if shared is not None:
+        path_cache = shared.path_cache
+    else:
+        path_cache = mfimp.PathCache(kw.get('volatile_path') or ())
+    # the targets of a batch share the path cache, so only count the
+    # lookups made for this target.
+    lookups = path_cache.hits + path_cache.misses
+    stat_calls = path_cache.stat_calls
+
+    def module_finder():
+        mf = MyModuleFinder(
+            syspath,                # module search path for this module finder
+            excludes=exclude,       # folders to exclude
+            path_cache=path_cache,
+            **kw
+        )
+        mf.debug = max(mf.debug, kw.get('debug_mf', 0))
+        return mf
+
+    # --deps-state FILE --changed [PATH ...] only re-scans the changed files
+    state_file = kw.get('deps_state')
+    changed = kw.get('changed')
+    if state_file:
+        state_file = os.path.join(target.calling_dir, state_file)
+        state_options = dict(
+            target=target.path,
+            syspath=syspath,
+            exclude=list(exclude),
+            pylib=bool(kw.get('pylib')),
+            pylib_all=bool(kw.get('pylib_all')),
+            extractor=kw.get('extractor') or 'bytecode',
+        )
+
+    with timings.stage('find_modules'):
+        mf = module_finder()
+        if (state_file and changed is not None
+                and mf.load_state(state_file, state_options)
+                and mf.update([os.path.join(target.calling_dir, p) for p in changed])):
+            log.info("incremental update of %s (changed: %r)", state_file, changed)
+        else:
+            if mf.modules:
+                mf = module_finder()  # discard partially loaded state
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("FNAME: %r, CONTENT:\n%s\n", dummy.fname, dummy.text())
+            mf.run_script(dummy.pathname, dummy.source)
+        if state_file:
+            mf.save_state(state_file, state_options)
+        if mf.scan_cache is not None:
+            log.debug("scan cache: %d hits, %d misses", mf.scan_cache.hits, mf.scan_cache.misses)
+            mf.scan_cache.prune()
+        log.debug("path cache: %d hits, %d misses, %d directories listed",
+                  mf.path_cache.hits, mf.path_cache.misses, len(mf.path_cache.listings))
+
+    timings.count('modules loaded', len(mf.modules))
+    timings.count('files compiled', mf.compiled)
+    timings.count('module lookups', path_cache.hits + path_cache.misses - lookups)
+    timings.count('stat calls', path_cache.stat_calls - stat_calls)
+    timings.count('regexes evaluated', mf.excluder.regex_calls)
+
+    if kw.get('save_snapshot'):
+        with timings.stage('snapshot'):
+            write_snapshot(
+                os.path.join(target.calling_dir, kw['save_snapshot']),
+                mf._depgraph, mf._types, mf.badmodules,
+                dict(_snapshot_options(target, exclude, kw), dummyname=dummy.fname),
+            )
+    return mf
+
+
+def _snapshot_options(target, exclude, kw):
+    """The target and the options that decide which modules are found
+       (saved in the meta data of snapshots).
+    """
+    return dict(target=target.path, exclude=list(exclude),
+                pylib=bool(kw.get('pylib')), pylib_all=bool(kw.get('pylib_all')))
+
+
+def _check_snapshot(snapshot, target, exclude, kw):
+    """Raise RuntimeError if ``snapshot`` was saved for another target, and
+       warn about options that differ from the run that saved it (the
+       snapshot's options are used).
+    """
+    fname = kw['from_snapshot']
+    options = _snapshot_options(target, exclude, kw)
+    if snapshot.meta.get('target') != options.pop('target'):
+        raise RuntimeError("{!r} is a snapshot of {!r}, not {!r}".format(
+            fname, snapshot.meta.get('target'), target.path
+        ))
+    for name, value in sorted(options.items()):
+        if snapshot.meta.get(name) != value:
+            log.warning("%s: %s=%r was used when saving the snapshot (not %r)",
+                        fname, name, snapshot.meta.get(name), value)
+
+
 def py2dep(target, **kw) -> depgraph.DepGraph:
     """"Calculate dependencies for ``pattern`` and return a DepGraph.
     """
     log.info("py2dep(%r)", target)
-    dummy = DummyModule(target, **kw)
-
-    kw['dummyname'] = dummy.fname
-    syspath = sys.path[:]
-    syspath.insert(0, target.syspath_dir)
+    timings = kw.get('timings')
+    if not isinstance(timings, Timings):
+        timings = kw['timings'] = Timings()
 
     # remove exclude so we don't pass it twice to modulefinder
     exclude = ['migrations'] + kw.pop('exclude', [])
@@ -243,66 +539,64 @@ def py2dep(target, **kw) -> depgraph.DepGraph:
     if 'fname' in kw:
         del kw['fname']
 
-    mf = MyModuleFinder(
-        syspath,                # module search path for this module finder
-        excludes=exclude,       # folders to exclude
-        **kw
-    )
-    mf.debug = max(mf.debug, kw.get('debug_mf', 0))
-    if log.isEnabledFor(logging.DEBUG):
-        log.debug("CURDIR: %s", os.getcwd())
-        log.debug("FNAME: %r, CONTENT:\n%s\n", dummy.fname, dummy.text())
-    mf.run_script(dummy.fname)
-
-    log.info("mf._depgraph:\n%s", json.dumps(dict(mf._depgraph), indent=4))
-    log.info("mf.badmodules:\n%s", json.dumps(mf.badmodules, indent=4))
-
-    if kw.get('include_missing'):
-        for k, vdict in list(mf.badmodules.items()):
-            if k not in mf._depgraph:
-                mf._depgraph[k] = {}
-            for v in vdict:
-                if not target.is_pysource and v not in mf._depgraph['__main__']:
-                    mf._depgraph['__main__'][v] = None
-                if v in mf._depgraph:
-                    mf._depgraph[v][k] = None
-                else:
-                    mf._depgraph[v] = {k: None}
-
-    log.info("mf._depgraph:\n%s", json.dumps(dict(mf._depgraph), indent=4))
-
-    kw['exclude'] = exclude
-
-    if kw.get('pylib'):
-        mf_depgraph = mf._depgraph
-        for k, v in list(mf._depgraph.items()):
-            log.debug('depgraph item: %r %r', k, v)
-        # mf_modules = {k: os.syspath.abspath(v.__file__)
-        #               for k, v in mf.modules.items()}
+    if kw.get('from_snapshot'):
+        # --from-snapshot FILE skips finding the modules
+        with timings.stage('snapshot'):
+            snapshot = read_snapshot(os.path.join(target.calling_dir, kw['from_snapshot']))
+        _check_snapshot(snapshot, target, exclude, kw)
+        kw['dummyname'] = snapshot.meta['dummyname']
+        raw_depgraph, types, badmodules = snapshot.depgraph, snapshot.types, snapshot.badmodules
     else:
-        pylib = pystdlib()
-        mf_depgraph = {}
-        for k, v in list(mf._depgraph.items()):
-            log.debug('depgraph item: %r %r', k, v)
-            if k in pylib:
-                continue
-            vals = {vk: vv for vk, vv in v.items() if vk not in pylib}
-            mf_depgraph[k] = vals
-
-        # mf_modules = {k: os.syspath.abspath(v.__file__)
-        #               for k, v in mf.modules.items()
-        #               if k not in pylib}
-
-    try:
-        import yaml
-        log.info("mf_depgraph:\n%s",
-                 yaml.dump(dict(mf_depgraph), default_flow_style=False))
-        # log.error("mf._types:\n%s", yaml.dump(mf._types, default_flow_style=False))
-        # log.debug("mf_modules:\n%s", yaml.dump(mf_modules, default_flow_style=False))
-    except ImportError:
-        log.info("mf_depgraph:\n%s", json.dumps(dict(mf_depgraph), indent=4))
-
-    return depgraph.DepGraph(mf_depgraph, mf._types, target, **kw)
+        mf = _find_modules(target, exclude, timings, kw)
+        raw_depgraph, types, badmodules = mf._depgraph, mf._types, mf.badmodules
+
+    with timings.stage('raw_depgraph'):
+        log.info("mf._depgraph:\n%s", lazylog.json_dump(raw_depgraph))
+        log.info("mf.badmodules:\n%s", lazylog.json_dump(badmodules))
+
+        if kw.get('include_missing'):
+            for k, vdict in list(badmodules.items()):
+                if k not in raw_depgraph:
+                    raw_depgraph[k] = {}
+                for v in vdict:
+                    if not target.is_pysource and v not in raw_depgraph['__main__']:
+                        raw_depgraph['__main__'][v] = None
+                    if v in raw_depgraph:
+                        raw_depgraph[v][k] = None
+                    else:
+                        raw_depgraph[v] = {k: None}
+
+        log.info("mf._depgraph:\n%s", lazylog.json_dump(raw_depgraph))
+
+        kw['exclude'] = exclude
+
+        debug = log.isEnabledFor(logging.DEBUG)
+        if kw.get('pylib'):
+            mf_depgraph = raw_depgraph
+            if debug:
+                for k, v in list(raw_depgraph.items()):
+                    log.debug('depgraph item: %r %r', k, v)
+            # mf_modules = {k: os.syspath.abspath(v.__file__)
+            #               for k, v in mf.modules.items()}
+        else:
+            shared = kw.get('shared_caches')
+            pylib = shared.pystdlib() if shared is not None else pystdlib()
+            mf_depgraph = {}
+            for k, v in list(raw_depgraph.items()):
+                if debug:
+                    log.debug('depgraph item: %r %r', k, v)
+                if k in pylib:
+                    continue
+                vals = {vk: vv for vk, vv in v.items() if vk not in pylib}
+                mf_depgraph[k] = vals
+
+            # mf_modules = {k: os.syspath.abspath(v.__file__)
+            #               for k, v in mf.modules.items()
+            #               if k not in pylib}
+
+        log.info("mf_depgraph:\n%s", lazylog.yaml_dump(mf_depgraph))
+
+    return depgraph.DepGraph(mf_depgraph, types, target, **kw)
 
 
 def py2depgraph():
@@ -7,8 +7,10 @@ import sys
 
 from pydeps.configs import Config
 
-from . import colors, cli, dot, py2depgraph, target
+from . import batch, colors, cli, dot, layout, py2depgraph, target
+from .cache import RenderCache
 from .depgraph2dot import dep2dot
+from .timings import Timings
 
 log = logging.getLogger(__name__)
 
@@ -19,7 +21,6 @@ def _pydeps(trgt, **kw):
     # code prettier (and more fault tolerant).
     # print("KW:", kw, '\n', os.getcwd())
     # print('abspath:', os.path.abspath(kw.get('deps_out')))
-    # print('target', trgt.workdir)
     # print('target', trgt)
     colors.START_COLOR = kw.get('start_color')
     # show_cycles = kw.get('show_cycles')
@@ -27,13 +28,17 @@ def _pydeps(trgt, **kw):
     no_output = kw.get('no_output')
     output = kw.get('output')
     fmt = kw['format']
+    builtin = layout.builtin_renderer(fmt, kw.get('renderer'))
     show_svg = kw.get('show')
     deps_out = kw.get('deps_out')
     dot_out = kw.get('dot_out')
+    # --timings prints a report at the end, while a Timings instance lets
+    # the caller collect the numbers.
+    timings = kw.get('timings')
+    show_timings = timings and not isinstance(timings, Timings)
+    if not isinstance(timings, Timings):
+        timings = kw['timings'] = Timings()
     # reverse = kw.get('reverse')
-    if os.getcwd() != trgt.workdir:
-        # the tests are calling _pydeps directoy
-        os.chdir(trgt.workdir)
 
     dep_graph = py2depgraph.py2dep(trgt, **kw)
 
@@ -45,11 +50,17 @@ def _pydeps(trgt, **kw):
             if not directory:
                 deps_out = os.path.join(trgt.calling_dir, deps_out)
             with open(deps_out, 'w') as fp:
-                fp.write(dep_graph.__json__())
+                dep_graph.write_json(fp, kw.get('deps_format') or 'json')
         else:
-            print(dep_graph.__json__())
+            dep_graph.write_json(sys.stdout, kw.get('deps_format') or 'json')
+            if kw.get('deps_format') != 'jsonl':
+                print()
 
-    dotsrc = depgraph_to_dotsrc(trgt, dep_graph, **kw)
+    timings.count('modules in graph', len(dep_graph.sources))
+    dotsrc = None
+    if not builtin or kw.get('show_dot'):
+        with timings.stage('dep2dot'):
+            dotsrc = depgraph_to_dotsrc(trgt, dep_graph, **kw)
 
     if not nodot:
         if kw.get('show_dot'):
@@ -65,33 +76,149 @@ def _pydeps(trgt, **kw):
                 print(dotsrc)
 
         if not no_output:
+            outputs = output_files(output, fmt)
+            output = outputs[0][1]
+            render_pool = kw.get('render_pool')
+            cache = render_cache(**kw) if not builtin else None
+            if builtin:
+                with timings.stage('layout'):
+                    layout.render(trgt, dep_graph, outputs, **kw)
+            elif render_pool is not None and not show_svg:
+                # the caller waits for the pool (see call_pydeps_many)
+                timings.count('bytes piped to dot', len(dot.to_bytes(dotsrc)))
+                render_pool.submit(render, dotsrc, outputs, kw.get('dot_timeout'), cache)
+            else:
+                timings.count('bytes piped to dot', len(dot.to_bytes(dotsrc)))
+                with timings.stage('dot'):
+                    render(dotsrc, outputs, kw.get('dot_timeout'), cache)
+                if cache is not None:
+                    timings.count('render cache hits', cache.hits)
+
+            if show_svg:
+                try:
+                    dot.display_svg(kw, output)
+                except OSError as cause:
+                    helpful = ""
+                    if cause.errno == 2:
+                        helpful = " (can be caused by not finding the program to open this file)"
+                    raise RuntimeError("While opening {!r}: {}{}".format(output, cause, helpful))
+
+    if show_timings:
+        timings_out = kw.get('timings_out')
+        if timings_out:
+            # make sure output files are written to sensible directories
+            directory, _fname = os.path.split(timings_out)
+            if not directory:
+                timings_out = os.path.join(trgt.calling_dir, timings_out)
+            with open(timings_out, 'w') as fp:
+                fp.write(timings.__json__())
+        else:
+            sys.stderr.write(timings.report() + '\n')
+
+
+def output_files(output, fmt):
+    """Return the list of ``(format, filename)`` pairs to render.
+
+       ``fmt`` can be several comma separated formats (e.g. ``svg,png``),
+       the files then get ``output`` with the extension replaced by each
+       format.
+    """
+    formats = [f.strip() for f in fmt.split(',') if f.strip()]
+    if len(formats) <= 1:
+        return [(fmt, output)]
+    base = os.path.splitext(output)[0]
+    return [(f, base + '.' + f) for f in formats]
+
+
+def _add_hover_style(svg):
+    return svg.replace(b'</title>', b'</title><style>.edge>path:hover{stroke-width:8}</style>')
+
+
+def render_cache(**kw):
+    """Return the :class:`pydeps.cache.RenderCache` to use, or None if
+       it is disabled (``--no-render-cache``) or we cannot run dot.
+    """
+    if kw.get('no_render_cache'):
+        return None
+    version = dot.graphviz_version()
+    if version is None:
+        return None
+    return RenderCache(kw.get('cache_dir'), graphviz_version=version)
+
+
+def render(dotsrc, outputs, timeout=None, cache=None):
+    """Render ``dotsrc`` to the ``(format, filename)`` pairs in
+       ``outputs`` with one dot process (unless all of them are in
+       ``cache``).
+    """
+    try:
+        _render(dotsrc, outputs, timeout, cache)
+    finally:
+        if cache is not None:
+            cache.prune()
+
+
+def _render(dotsrc, outputs, timeout, cache):
+    fmt, output = outputs[0]
+    if len(outputs) > 1:
+        rendered = dict.fromkeys(output for fmt, output in outputs)
+        if cache is not None:
+            for fmt, output in outputs:
+                rendered[output] = cache.get_rendered(dotsrc, fmt)
+        if not all(rendered.values()):
+            # don't read back files left by an earlier run if dot fails
+            for fmt, output in outputs:
+                try:
+                    os.remove(output)
+                except OSError:
+                    pass
             try:
-                svg = dot.call_graphviz_dot(dotsrc, fmt)
+                dot.call_graphviz_dot(dotsrc, fmt, timeout=timeout, outputs=outputs)
             except OSError as cause:
                 raise RuntimeError("While rendering {!r}: {}".format(output, cause))
+            for fmt, output in outputs:
+                try:
+                    with open(output, 'rb') as fp:
+                        rendered[output] = fp.read()
+                except OSError:
+                    rendered[output] = None
+                if cache is not None and rendered[output] and rendered[output].strip():
+                    cache.put_rendered(dotsrc, fmt, rendered[output])
+        for fmt, output in outputs:
+            svg = rendered[output]
             if not svg or not svg.strip():
                 raise RuntimeError(
                     "Graphviz 'dot' produced empty output for {!r}; "
                     "the dependency graph could not be rendered.".format(output)
                 )
             if fmt == 'svg':
-                svg = svg.replace(b'</title>', b'</title><style>.edge>path:hover{stroke-width:8}</style>')
-
+                svg = _add_hover_style(svg)
             try:
                 with open(output, 'wb') as fp:
                     cli.verbose("Writing output to:", output)
                     fp.write(svg)
             except OSError as cause:
                 raise RuntimeError("While writing {!r}: {}".format(output, cause))
+        return
+
+    try:
+        svg = dot.call_graphviz_dot(dotsrc, fmt, timeout=timeout, cache=cache)
+    except OSError as cause:
+        raise RuntimeError("While rendering {!r}: {}".format(output, cause))
+    if not svg or not svg.strip():
+        raise RuntimeError(
+            "Graphviz 'dot' produced empty output for {!r}; "
+            "the dependency graph could not be rendered.".format(output)
+        )
+    if fmt == 'svg':
+        svg = _add_hover_style(svg)
 
-            if show_svg:
-                try:
-                    dot.display_svg(kw, output)
-                except OSError as cause:
-                    helpful = ""
-                    if cause.errno == 2:
-                        helpful = " (can be caused by not finding the program to open this file)"
-                    raise RuntimeError("While opening {!r}: {}{}".format(output, cause, helpful))
+    try:
+        with open(output, 'wb') as fp:
+            cli.verbose("Writing output to:", output)
+            fp.write(svg)
+    except OSError as cause:
+        raise RuntimeError("While writing {!r}: {}".format(output, cause))
 
 
 def depgraph_to_dotsrc(target, dep_graph, **kw):
@@ -152,6 +279,8 @@ def pydeps(**args):
     sys.setrecursionlimit(10000)
     _args = dict(iter(Config(**args))) if args else cli.parse_args(sys.argv[1:])
     _args['curdir'] = os.getcwd()
+    if _args.get('batch'):
+        return _pydeps_batch(_args)
     inp = target.Target(_args['fname'])
     log.debug("Target: %r", inp)
 
@@ -160,29 +289,49 @@ def pydeps(**args):
     else:
         _args['output'] = os.path.join(
             inp.calling_dir,
-            inp.modpath.replace('.', '_') + '.' + _args.get('format', 'svg')
+            inp.modpath.replace('.', '_') + '.' + _args.get('format', 'svg').split(',')[0]
         )
 
-    with inp.chdir_work():
-        # log.debug("Current directory: %s", os.getcwd())
-        _args['fname'] = inp.fname
-        _args['isdir'] = inp.is_dir
+    _args['fname'] = inp.fname
+    _args['isdir'] = inp.is_dir
 
-        if _args.get('externals'):
-            del _args['fname']
-            exts = externals(inp, **_args)
-            print(json.dumps(exts, indent=4))
-            # return exts  # so the tests can assert
+    if _args.get('externals'):
+        del _args['fname']
+        exts = externals(inp, **_args)
+        print(json.dumps(exts, indent=4))
+        # return exts  # so the tests can assert
 
-        else:
-            # this is the call you're looking for :-)
-            try:
-                return _pydeps(inp, **_args)
-            except (OSError, RuntimeError) as cause:
-                if log.isEnabledFor(logging.DEBUG):
-                    # we only want to log the exception if we're in debug mode
-                    log.exception("While running pydeps:")
-                cli.error(str(cause))
+    else:
+        # this is the call you're looking for :-)
+        try:
+            return _pydeps(inp, **_args)
+        except (OSError, RuntimeError) as cause:
+            if log.isEnabledFor(logging.DEBUG):
+                # we only want to log the exception if we're in debug mode
+                log.exception("While running pydeps:")
+            cli.error(str(cause))
+
+
+def _pydeps_batch(args):
+    """Run pydeps on all the targets in the ``--batch`` file.
+    """
+    try:
+        options, targets = batch.load_batch(args['batch'])
+    except (OSError, RuntimeError) as cause:
+        cli.error(str(cause))
+    # -o and the display options don't make sense for several targets
+    kwargs = {k: v for k, v in args.items() if k not in {'fname', 'batch', 'curdir', 'output', 'show'}}
+    kwargs.update(options)
+
+    failed = []
+
+    def on_error(fname, cause):
+        failed.append(fname)
+        sys.stderr.write("While running pydeps on {!r}: {}\n".format(fname, cause))
+
+    call_pydeps_many(targets, on_error=on_error, **kwargs)
+    if failed:
+        cli.error("pydeps failed for {} of {} targets".format(len(failed), len(targets)))
 
 
 def call_pydeps(file_or_dir, **kwargs):
@@ -200,19 +349,64 @@ def call_pydeps(file_or_dir, **kwargs):
     else:
         config.output = os.path.join(
             inp.calling_dir,
-            inp.modpath.replace('.', '_') + '.' + config.format
+            inp.modpath.replace('.', '_') + '.' + config.format.split(',')[0]
         )
 
     ctx = dict(iter(config))
 
-    with inp.chdir_work():
-        ctx['fname'] = inp.fname
-        ctx['isdir'] = inp.is_dir
-        if config.externals:
-            del ctx['fname']
-            return externals(inp, **ctx)
+    ctx['fname'] = inp.fname
+    ctx['isdir'] = inp.is_dir
+    if config.externals:
+        del ctx['fname']
+        return externals(inp, **ctx)
+
+    return _pydeps(inp, **ctx)
+
+
+def call_pydeps_many(targets, on_error=None, **kwargs):
+    """Programatic entry point for running pydeps on many targets in one
+       process.
 
-        return _pydeps(inp, **ctx)
+       ``targets`` is a list of file or directory names, or of dicts with the
+       ``fname`` and options of a target (overriding ``kwargs``). The targets
+       share caches (see :class:`pydeps.batch.SharedCaches`), so modules that
+       are imported by several targets are only located and scanned once.
+
+       The graphs are rendered concurrently, in at most ``render_jobs``
+       (default: one per cpu) dot processes at a time.
+
+       Returns the list of :func:`call_pydeps` results. When a target fails
+       (with OSError or RuntimeError) the exception is raised, unless
+       ``on_error`` is given: it is then called with the target's fname and
+       the exception, and the rest of the targets are processed.
+    """
+    shared = batch.SharedCaches(kwargs.get('volatile_path') or ())
+    results = []
+    rendering = []   # (fname, future)
+    with dot.RenderPool(kwargs.pop('render_jobs', None)) as pool:
+        for item in targets:
+            options = dict(kwargs)
+            options.update(item if isinstance(item, dict) else {'fname': item})
+            fname = options.pop('fname')
+            options.pop('render_jobs', None)
+            submitted = len(pool.pending)
+            try:
+                results.append(call_pydeps(fname, shared_caches=shared, render_pool=pool, **options))
+            except (OSError, RuntimeError) as cause:
+                if on_error is None:
+                    raise
+                on_error(fname, cause)
+                results.append(None)
+            rendering.extend((fname, future) for future in pool.pending[submitted:])
+        pool.wait()
+    for fname, future in rendering:
+        cause = future.exception()
+        if cause is None:
+            continue
+        if on_error is None or not isinstance(cause, (OSError, RuntimeError)):
+            raise cause
+        on_error(fname, cause)
+    return results
 
 
 if __name__ == '__main__':  # pragma: nocover
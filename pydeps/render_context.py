@@ -143,6 +143,9 @@ class RenderBuffer(object):
                  remove_islands=False, **kw):
         self.target = target
         self.nodes = []
+        #: node name -> attrs of the (first) node with that name in
+        #: ``self.nodes`` (maintained by :meth:`_add_nodes`)
+        self.node_attrs = {}
         self.rule_nodes = set()
         self.clusters = defaultdict(list)
         self.rules = {}
@@ -158,11 +161,19 @@ class RenderBuffer(object):
         self.collapse_target_cluster = collapse_target_cluster
         self.remove_islands = remove_islands
 
+    def _add_nodes(self, nodes):
+        """Add the ``(name, attrs)`` pairs in ``nodes`` to the
+           non-clustered nodes.
+        """
+        self.nodes += nodes
+        for node, attrs in nodes:
+            self.node_attrs.setdefault(node, attrs)
+
     def _nodecolor(self, n):
-        for node, attrs in self.nodes:
-            if node == n:
-                return attrs['fillcolor']
-        return '#000000'
+        attrs = self.node_attrs.get(n)
+        if attrs is None:
+            return '#000000'
+        return attrs['fillcolor']
 
     def cluster_stats(self):
         maxnodes = max(len(v) for v in self.clusters.values())
@@ -181,54 +192,61 @@ class RenderBuffer(object):
                 continue
             if len(nodes) < self.min_cluster_size:
                 # print("REMOVING:CLUSTER:", clusterid, nodes)
-                self.nodes += nodes
+                self._add_nodes(nodes)
                 _remove.append(clusterid)
         for _r in _remove:
             del self.clusters[_r]
 
-    def _collapse_cluster(self, clusterid, nodes):
+    def _collapse_cluster(self, clusterid, nodes, remap):
         """Add a single cluster node (with a label listing contents?)
-           and change all rules to reference this node instead.
+           and record in ``remap`` that rules referencing the nodes in
+           the cluster should reference this node instead (see
+           :meth:`_remap_rules`).
         """
         first_node, first_attrs = nodes[0]
         first_attrs['shape'] = 'folder'
         first_attrs['label'] = clusterid
-        self.nodes.append((clusterid, first_attrs))
+        self._add_nodes([(clusterid, first_attrs)])
 
         for node, attrs in nodes:   # for each node in this cluster
-            # check all rules for in/out relations
-            rules = list(self.rules.items())
-            self.rules = {}
-            for (a, b), rule_attrs in rules:
-                # orig = (a, b)
-                if a == node:
-                    a = clusterid
-                if b == node:
-                    b = clusterid
-                # if orig != (a, b):
-                #     print("CHANGED[{}|{}]: {} TO {}".format(clusterid, node, orig, (a, b)))
-                self.rules[(a, b)] = rule_attrs
+            remap[node] = clusterid
 
         del self.clusters[clusterid]
 
+    def _remap_rules(self, remap):
+        """Change all rules to reference ``remap[node]`` instead of
+           ``node``, in a single pass. Rules that become duplicates are
+           merged (the attributes of the last one are used).
+        """
+        if not remap:
+            return
+        rules = self.rules
+        self.rules = {}
+        for (a, b), rule_attrs in rules.items():
+            self.rules[(remap.get(a, a), remap.get(b, b))] = rule_attrs
+
     def triage_clusters(self):
         target_cluster = self._target_clusterid()
 
         if not self.collapse_target_cluster and not self.keep_target_cluster:
             # don't put nodes from the target into a cluster
-            self.nodes += self.clusters[target_cluster]
+            self._add_nodes(self.clusters[target_cluster])
             del self.clusters[target_cluster]
 
         self._remove_small_clusters()
 
+        remap = {}     # node -> collapsed cluster
+
         # collapse target cluster if requested
         if self.collapse_target_cluster:
-            self._collapse_cluster(target_cluster, self.clusters[target_cluster])
+            self._collapse_cluster(target_cluster, self.clusters[target_cluster], remap)
 
         # collapse clusters that are too big
         for clusterid, nodes in sorted(self.clusters.items()):
             if len(nodes) > self.max_cluster_size and clusterid != target_cluster:
-                self._collapse_cluster(clusterid, nodes)
+                self._collapse_cluster(clusterid, nodes, remap)
+
+        self._remap_rules(remap)
 
     def text(self):
         ctx = RenderContext(reverse=self.reverse, rankdir=self.rankdir)
@@ -309,7 +327,7 @@ class RenderBuffer(object):
         if self.cluster:
             self.clusters[clusterid].append((n, attrs))
         else:
-            self.nodes.append((n, attrs))
+            self._add_nodes([(n, attrs)])
 
     def write_rule(self, a, b, **attrs):
         self.rule_nodes.add(a)
@@ -0,0 +1,190 @@
+"""
+Binary snapshots of the raw dependency graph (``--save-snapshot`` and
+``--from-snapshot``).
+
+A snapshot holds what :class:`pydeps.py2depgraph.MyModuleFinder` found
+(``_depgraph``, ``_types`` and ``badmodules``), so later runs can try
+other graph and rendering options without finding the modules again.
+
+The file is a fixed size header followed by a string table and integer
+arrays (all 8 byte aligned, in the byte order of the machine that wrote
+it)::
+
+    header
+    string offsets      int64[nstrings + 1]
+    string data         utf-8, padded to a multiple of 8 bytes
+    depgraph sources    int64[nsources]         string ids
+    depgraph offsets    int64[nsources + 1]     into the next two arrays
+    imported modules    int64[nedges]           string ids
+    imported paths      int64[nedges]           string ids (-1 -> None)
+    types names         int64[ntypes]           string ids
+    types values        int64[ntypes]
+    badmodule names     int64[nbad]             string ids
+    badmodule offsets   int64[nbad + 1]         into the next array
+    badmodule callers   int64[nbadcallers]      string ids
+
+Reading a snapshot maps the file into memory and reads the arrays
+through :class:`memoryview` casts of the mapping (without copying them),
+then decodes the strings and builds the dicts in one pass before the
+file is closed.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import defaultdict
+
+MAGIC = b'PYDEPSSN'
+
+#: bump this when the format changes
+SNAPSHOT_VERSION = 1
+
+#: magic, version, byte order (0 little, 1 big), string id of the meta
+#: data (json), and the lengths of the arrays.
+HEADER = struct.Struct('<8sIIqqqqqqqq')
+
+
+def _pad(n):
+    return -n % 8
+
+
+class Snapshot(object):
+    """A raw dependency graph read from a snapshot file.
+
+       ``depgraph``, ``types`` and ``badmodules`` have the same structure
+       as the corresponding :class:`pydeps.py2depgraph.MyModuleFinder`
+       attributes, and ``meta`` is a dict with information about the run
+       that saved the snapshot (e.g. the name of the dummy module).
+    """
+    def __init__(self, depgraph, types, badmodules, meta):
+        self.depgraph = depgraph
+        self.types = types
+        self.badmodules = badmodules
+        self.meta = meta
+
+
+def write_snapshot(fname, depgraph, types, badmodules, meta):
+    """Write the raw dependency graph to the file ``fname``.
+    """
+    strings = {}
+
+    def sid(s):
+        if s is None:
+            return -1
+        i = strings.get(s)
+        if i is None:
+            i = strings[s] = len(strings)
+        return i
+
+    meta_id = sid(json.dumps(meta, sort_keys=True))
+
+    sources, offsets, targets, paths = array('q'), array('q', [0]), array('q'), array('q')
+    for name, imports in depgraph.items():
+        sources.append(sid(name))
+        for iname, path in imports.items():
+            targets.append(sid(iname))
+            paths.append(sid(path))
+        offsets.append(len(targets))
+
+    type_names = array('q', [sid(name) for name in types])
+    type_values = array('q', [int(kind) for kind in types.values()])
+
+    bad_names, bad_offsets, bad_callers = array('q'), array('q', [0]), array('q')
+    for name, callers in badmodules.items():
+        bad_names.append(sid(name))
+        bad_callers.extend(sid(caller) for caller in callers)
+        bad_offsets.append(len(bad_callers))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    string_offsets = array('q', [0])
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+    string_data = b''.join(encoded)
+
+    with open(fname, 'wb') as fp:
+        fp.write(HEADER.pack(
+            MAGIC, SNAPSHOT_VERSION, sys.byteorder == 'big', meta_id,
+            len(strings), len(string_data), len(sources), len(targets),
+            len(type_names), len(bad_names), len(bad_callers),
+        ))
+        fp.write(string_offsets.tobytes())
+        fp.write(string_data + b'\0' * _pad(len(string_data)))
+        for arr in (sources, offsets, targets, paths, type_names, type_values,
+                    bad_names, bad_offsets, bad_callers):
+            fp.write(arr.tobytes())
+
+
+def read_snapshot(fname):
+    """Read a snapshot written by :func:`write_snapshot`, and return a
+       :class:`Snapshot`.
+
+       Raises RuntimeError if ``fname`` isn't a (compatible) snapshot.
+    """
+    with open(fname, 'rb') as fp:
+        try:
+            buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:   # empty file
+            buf = b''
+    view = memoryview(buf)
+    try:
+        return _read(fname, view)
+    finally:
+        view.release()
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+
+
+def _read(fname, view):
+    if len(view) < HEADER.size:
+        raise RuntimeError("{!r} is not a pydeps snapshot".format(fname))
+    (magic, version, bigendian, meta_id, nstrings, nbytes, nsources, nedges,
+     ntypes, nbad, nbadcallers) = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise RuntimeError("{!r} is not a pydeps snapshot".format(fname))
+    if version != SNAPSHOT_VERSION or bool(bigendian) != (sys.byteorder == 'big'):
+        raise RuntimeError("{!r} was saved by an incompatible version of pydeps".format(fname))
+
+    pos = HEADER.size
+    views = []   # must be released before the file is unmapped
+
+    def ints(n):
+        nonlocal pos
+        if pos + 8 * n > len(view):
+            raise RuntimeError("{!r} is truncated".format(fname))
+        res = view[pos:pos + 8 * n].cast('q')
+        views.append(res)
+        pos += 8 * n
+        return res
+
+    try:
+        string_offsets = ints(nstrings + 1)
+        string_data = view[pos:pos + nbytes]
+        views.append(string_data)
+        pos += nbytes + _pad(nbytes)
+        sources, offsets = ints(nsources), ints(nsources + 1)
+        targets, paths = ints(nedges), ints(nedges)
+        type_names, type_values = ints(ntypes), ints(ntypes)
+        bad_names, bad_offsets, bad_callers = ints(nbad), ints(nbad + 1), ints(nbadcallers)
+
+        strings = [
+            str(string_data[string_offsets[i]:string_offsets[i + 1]], 'utf-8')
+            for i in range(nstrings)
+        ]
+        strings.append(None)    # string id -1
+
+        depgraph = defaultdict(dict)
+        for i, name in enumerate(sources):
+            depgraph[strings[name]] = {
+                strings[targets[j]]: strings[paths[j]] for j in range(offsets[i], offsets[i + 1])
+            }
+        types = {strings[name]: kind for name, kind in zip(type_names, type_values)}
+        badmodules = {
+            strings[name]: {strings[bad_callers[j]]: 1 for j in range(bad_offsets[i], bad_offsets[i + 1])}
+            for i, name in enumerate(bad_names)
+        }
+        meta = json.loads(strings[meta_id])
+    finally:
+        for v in views:
+            v.release()
+    return Snapshot(depgraph, types, badmodules, meta)
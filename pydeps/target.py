@@ -4,10 +4,7 @@ Abstracting the target for pydeps to work on.
 import json
 import os
 import re
-import shutil
 import sys
-import tempfile
-from contextlib import contextmanager
 import logging
 log = logging.getLogger(__name__)
 
@@ -55,12 +52,6 @@ class Target(object):
             self.dirname = os.path.dirname(self.path)
             self.modname = os.path.splitext(self.fname)[0]
 
-        if self.is_pysource:
-            # we will work directly on the file (in-situ)
-            self.workdir = os.path.dirname(self.path)
-        else:
-            self.workdir = os.path.realpath(tempfile.mkdtemp())
-
         self.syspath_dir = self.get_package_root()
         # split path such that syspath_dir + relpath == path
         self.relpath = self.path[len(self.syspath_dir):].lstrip(os.path.sep)
@@ -108,18 +99,6 @@ class Target(object):
 
         return self.calling_fname if self.use_calling_fname else self.fname
 
-    @contextmanager
-    def chdir_work(self):
-        try:
-            os.chdir(self.workdir)
-            sys.path.insert(0, self.syspath_dir)
-            yield
-        finally:
-            os.chdir(self.calling_dir)
-            if sys.path[0] == self.syspath_dir:
-                sys.path = sys.path[1:]
-            self.close()
-
     def get_package_root(self):
         for d in self.get_parents():
             if '__init__.py' not in os.listdir(d):
@@ -144,20 +123,6 @@ class Target(object):
             res[0] += os.path.sep
         return res
 
-    def __del__(self):
-        self.close()
-
-    def close(self):
-        """Clean up after ourselves.
-        """
-        try:
-            # make sure we don't delete the user's source file if we're working
-            # on it in-situ.
-            if not self.is_pysource and hasattr(self, 'workdir'):
-                shutil.rmtree(self.workdir)
-        except OSError:
-            pass
-
     def __repr__(self):  # pragma: nocover
         return json.dumps(
             {k: v for k, v in self.__dict__.items() if not k.startswith('_')},
@@ -0,0 +1,78 @@
+"""
+Wall and cpu time, and counters, for each stage of a pydeps run
+(``--timings``).
+"""
+import json
+import time
+from contextlib import contextmanager
+
+
+class Timings(object):
+    """Records the wall and cpu time spent in each stage of a run, and
+       counters (modules loaded, edges created, etc.).
+
+       Pass an instance as ``timings`` to :func:`pydeps.pydeps._pydeps` (or
+       :func:`pydeps.py2depgraph.py2dep`) to get the numbers for a run
+       programmatically::
+
+           timings = Timings()
+           _pydeps(target, timings=timings, **kw)
+           print(timings.report())
+
+    """
+    def __init__(self):
+        #: stage name -> {'wall': seconds, 'cpu': seconds} (in the order
+        #: the stages were first entered)
+        self.stages = {}
+        #: counter name -> int
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Add the time spent in the ``with`` block to stage ``name``.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield self
+        finally:
+            t = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+            t['wall'] += time.perf_counter() - wall
+            t['cpu'] += time.process_time() - cpu
+
+    def count(self, name, n=1):
+        """Add ``n`` to counter ``name``.
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @property
+    def total(self):
+        """The sum of the wall and cpu time of all stages.
+        """
+        return {
+            'wall': sum(t['wall'] for t in self.stages.values()),
+            'cpu': sum(t['cpu'] for t in self.stages.values()),
+        }
+
+    def __json__(self):
+        return json.dumps({
+            'stages': self.stages,
+            'total': self.total,
+            'counters': self.counters,
+        }, indent=4)
+
+    def report(self):
+        """Return the timings as a table.
+        """
+        total = self.total
+        width = max([len(name) for name in list(self.stages) + list(self.counters)] + [5])
+        lines = ['%-*s %10s %10s' % (width, 'stage', 'wall', 'cpu')]
+        for name, t in list(self.stages.items()) + [('total', total)]:
+            lines.append('%-*s %9.3fs %9.3fs' % (width, name, t['wall'], t['cpu']))
+        if self.counters:
+            lines.append('')
+            for name, n in self.counters.items():
+                lines.append('%-*s %10d' % (width, name, n))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
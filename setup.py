@@ -10,7 +10,7 @@ version='3.0.6'
 setuptools.setup(
     name='pydeps',
     version=version,
-    packages=setuptools.find_packages(exclude=['tests*']),
+    packages=setuptools.find_packages(exclude=['tests*', 'benchmarks*']),
     python_requires=">=3.10",
     install_requires=[
         'stdlib_list',
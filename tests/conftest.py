@@ -0,0 +1,27 @@
+import pytest
+
+from pydeps import mf27
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Keep the (render and scan) caches of the tests out of the user's
+       cache directory.
+    """
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """The path names of the files the module finder compiles (in this
+       process), in order.
+    """
+    paths = []
+
+    def _compile(txt, pathname, *args, **kwargs):
+        paths.append(pathname)
+        return compile(txt, pathname, *args, **kwargs)
+
+    monkeypatch.setattr(mf27, 'compile', _compile, raising=False)
+    return paths
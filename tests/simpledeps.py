@@ -14,10 +14,9 @@ def empty(args="", **kw):
 def depgrf(item, args=""):
     t = Target(item)
     # print("TARGET:", t)
-    with t.chdir_work():
-        res = py2dep(t, **empty(args))
-        # print("DEPGRPH:", res)
-        return res
+    res = py2dep(t, **empty(args))
+    # print("DEPGRPH:", res)
+    return res
 
 
 def simpledeps(item, args=""):
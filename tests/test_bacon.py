@@ -0,0 +1,37 @@
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf, simpledeps
+
+
+FILES = """
+    foo:
+        - __init__.py
+        - a.py: |
+            from . import b
+        - b.py: |
+            from . import c
+        - c.py: |
+            from . import d
+        - d.py
+        - e.py: |
+            from . import c
+"""
+
+
+def test_bacon_distance():
+    with create_files(FILES) as workdir:
+        g = depgrf('foo', '--max-bacon 0')
+        assert g['__main__'].bacon == 0
+        # the dummy module imports all modules in the package
+        assert {g[name].bacon for name in ('foo.a', 'foo.b', 'foo.c', 'foo.d')} == {1}
+
+
+def test_bacon_roots():
+    with create_files(FILES) as workdir:
+        g = depgrf('foo', '--max-bacon 0 --bacon-roots foo.a foo.e')
+        assert (g['foo.a'].bacon, g['foo.e'].bacon) == (0, 0)
+        assert g['foo.b'].bacon == 1
+        assert g['foo.c'].bacon == 1   # shortest path, from foo.e
+        assert g['foo.d'].bacon == 2
+
+        deps = simpledeps('foo', '--max-bacon 1 --bacon-roots foo.a')
+        assert deps == {'foo.b -> foo.a'}
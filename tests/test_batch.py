@@ -0,0 +1,97 @@
+import json
+import os
+
+from pydeps.batch import load_batch
+from pydeps.pydeps import call_pydeps_many, pydeps
+from pydeps.timings import Timings
+from tests.filemaker import create_files
+
+
+FILES = """
+    - common.py: |
+        VALUE = 1
+    - foo:
+        - __init__.py
+        - a.py: |
+            import common
+    - bar:
+        - __init__.py
+        - b.py: |
+            import common
+"""
+
+
+def read_deps(fname):
+    with open(fname) as fp:
+        return json.load(fp)
+
+
+def test_call_pydeps_many(compiled):
+    with create_files(FILES) as workdir:
+        timings = [Timings(), Timings()]
+        call_pydeps_many(
+            [dict(fname='foo', deps_out='foo.json', timings=timings[0]),
+             dict(fname='bar', deps_out='bar.json', timings=timings[1])],
+            no_output=True, show_deps=True, no_config=True, max_bacon=10,
+        )
+        assert 'common' in read_deps('foo.json')['foo.a']['imports']
+        assert 'foo.a' not in read_deps('bar.json')
+        assert 'common' in read_deps('bar.json')['bar.b']['imports']
+        # common.py was only compiled for the first target
+        assert [os.path.basename(p) for p in compiled].count('common.py') == 1
+        assert timings[1].counters['files compiled'] < timings[0].counters['files compiled']
+        assert timings[1].counters['modules loaded'] > timings[1].counters['files compiled']
+
+
+def test_call_pydeps_many_counters():
+    # the counters of a target only count its own module lookups
+    with create_files(FILES) as workdir:
+        alone = Timings()
+        call_pydeps_many([dict(fname='bar', timings=alone)], no_output=True, no_config=True)
+        timings = [Timings(), Timings()]
+        call_pydeps_many(
+            [dict(fname='foo', timings=timings[0]), dict(fname='bar', timings=timings[1])],
+            no_output=True, no_config=True,
+        )
+        assert timings[1].counters['module lookups'] == alone.counters['module lookups']
+        assert timings[1].counters['stat calls'] < alone.counters['stat calls']
+
+
+def test_call_pydeps_many_errors():
+    with create_files(FILES) as workdir:
+        errors = []
+        results = call_pydeps_many(
+            ['foo', 'bar'], on_error=lambda fname, cause: errors.append(fname),
+            no_output=True, show_deps=True, deps_out='/nonexistent/dir/deps.json', no_config=True,
+        )
+        assert results == [None, None]
+        assert errors == ['foo', 'bar']
+
+
+def test_batch_file():
+    batchfile = """
+        max_bacon = 0
+        exclude = "os"
+        no_output = true
+        show_deps = true
+
+        [[target]]
+        fname = "foo"
+        deps_out = "foo.json"
+
+        [[target]]
+        fname = "bar"
+        deps_out = "bar.json"
+        max_bacon = "1"
+    """
+    with create_files(FILES) as workdir:
+        with open('targets.toml', 'w') as fp:
+            fp.write('\n'.join(line.strip() for line in batchfile.splitlines()))
+        options, targets = load_batch('targets.toml')
+        assert options['max_bacon'] > 2 ** 31
+        assert targets[1] == dict(fname='bar', deps_out='bar.json', max_bacon=1)
+        assert options['exclude'] == ['os']
+
+        pydeps(batch='targets.toml', no_config=True)
+        assert 'foo.a' in read_deps('foo.json')
+        assert 'bar.b' in read_deps('bar.json')
@@ -0,0 +1,123 @@
+from pydeps.depgraph import DepGraph, adjacency_arrays, transposed_arrays
+from pydeps.target import Target
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf, empty
+
+
+def test_adjacency_arrays():
+    offsets, targets = adjacency_arrays(4, [(0, 1), (2, 3), (0, 2), (2, 0)])
+    assert list(offsets) == [0, 2, 2, 4, 4]
+    assert list(targets) == [1, 2, 3, 0]
+    offsets, targets = transposed_arrays(offsets, targets)
+    assert list(offsets) == [0, 1, 2, 3, 4]
+    assert list(targets) == [2, 0, 0, 2]
+
+
+def test_sources_are_views():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from . import b, c
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf("foo")
+        assert len(g.sources) == len(list(g.sources))
+        a, b, c = g['foo.a'], g['foo.b'], g['foo.c']
+        assert sorted(a.imports) == ['foo', 'foo.b', 'foo.c']
+        assert sorted(c.imported_by) == ['__main__', 'foo.a', 'foo.b']
+        assert (c.in_degree, c.out_degree) == (len(c.imports), len(c.imported_by))
+        assert c.bacon == 1
+        assert not c.excluded
+        assert not hasattr(c, '__dict__')
+        assert c.name_parts == ['foo', 'c']
+        assert g._split_name('foo.c') is g._split_name('foo.c')    # split once
+        c.name_parts.append('x')
+        assert c.name_parts == ['foo', 'c']
+        assert c.path_parts[-1] == 'c.py'
+
+
+def test_source_paths():
+    # a module that is first seen as an importer (without imports of its
+    # own) keeps a null path, a module that imports something gets the
+    # path from where it is imported.
+    files = """
+        a.py: ""
+    """
+    raw = {
+        'foo.c': {},
+        '__main__': {'foo.a': '/x/foo/a.py', 'foo.c': '/x/foo/c.py'},
+        'foo.a': {'foo.c': '/x/foo/c.py'},
+    }
+    with create_files(files) as workdir:
+        g = DepGraph(raw, {}, Target('a.py'), **empty(max_bacon=10, dummyname='a.py'))
+        assert g['foo.c'].path is None
+        assert g['foo.a'].path == '/x/foo/a.py'
+
+
+def test_remove_excluded_renumbers():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf("foo", "-x foo.b")
+        assert 'foo.b' not in g.sources
+        assert g['foo.a'].imports == ['foo']
+        assert 'foo.b' not in g['foo.c'].imported_by
+        for name, src in g.sources.items():
+            assert src.name == name
+            for imp in src.imports:
+                assert name in g[imp].imported_by
+
+
+def test_edges():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                import os
+                from . import b, c
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf("foo", "--pylib")
+        edges = {(a.name, b.name) for a, b in g.edges()}
+        assert ('foo.b', 'foo.a') in edges
+        assert ('foo.c', 'foo.b') in edges
+        # parent packages are not included
+        assert ('foo', 'foo.a') not in edges
+        # neither are the imports of skip_modules
+        assert not [b for a, b in edges if b in g.skip_modules]
+        assert list(g) == list(g.edges())
+
+
+def test_edge_metrics():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from .b import c
+                import bar
+            - b:
+                - __init__.py
+                - c.py
+        bar:
+            - __init__.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf("foo", "--pylib")
+        a, c, bar = g['foo.a'], g['foo.b.c'], g['bar']
+        assert g.edge_metrics(c, a) == (g.proximity_metric(c, a), g.dissimilarity_metric(c, a)) == (1, 2)
+        assert g.edge_metrics(bar, a) == (1, 2)
+        assert g.edge_metrics(a, a) == (2, 0)
@@ -1,4 +1,10 @@
-from pydeps.dot import dot, cmd2args
+import os
+import sys
+
+import pytest
+
+from pydeps.dot import dot, cmd2args, pipe, RenderPool
+from pydeps.pydeps import output_files, render
 
 def test_svg(tmpdir):
     tmpdir.chdir()
@@ -22,6 +28,17 @@ def test_svg_str(tmpdir):
     assert ab.exists()
 
 
+def test_multiple_outputs(tmpdir):
+    tmpdir.chdir()
+    dot("""
+    digraph G {
+        a -> b
+    }
+    """, outputs=[('svg', 'ab.svg'), ('dot', 'ab.dot')])
+    assert tmpdir.join('ab.svg').exists()
+    assert tmpdir.join('ab.dot').exists()
+
+
 def test_boolopt(tmpdir):
     tmpdir.chdir()
     ab = tmpdir.join('ab.svg')
@@ -59,3 +76,59 @@ def test_obj(tmpdir):  # pragma: nocover
 
 def test_cmd2args():
     assert cmd2args([1, 2]) == [1, 2]
+
+
+def test_output_files():
+    assert output_files('a/foo.svg', 'svg') == [('svg', 'a/foo.svg')]
+    assert output_files('a/foo.svg', 'svg,png') == [('svg', 'a/foo.svg'), ('png', 'a/foo.png')]
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="uses sleep")
+def test_pipe_timeout():
+    with pytest.raises(RuntimeError) as e:
+        pipe(['sleep', '10'], b'', timeout=0.1)
+    assert "didn't finish" in str(e.value)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="uses false")
+def test_pipe_exit_status():
+    with pytest.raises(RuntimeError) as e:
+        pipe(['false'], b'')
+    assert "exit code 1" in str(e.value)
+
+
+def _fake_dot(tmpdir, monkeypatch, script):
+    bindir = tmpdir.mkdir('bin')
+    fake = bindir.join('dot')
+    fake.write('#!/bin/sh\n' + script)
+    fake.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bindir) + os.pathsep + os.environ['PATH'])
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="uses a shell script")
+def test_dot_args(tmpdir, monkeypatch):
+    # file names are passed as separate arguments, without any quoting
+    _fake_dot(tmpdir, monkeypatch, 'for a in "$@"; do echo "$a"; done\n')
+    out = dot('digraph G {}', outputs=[('svg', 'a b/c.svg'), ('png', "it's.png")])
+    assert out.decode().splitlines() == ['-Gstart=1', '-Tsvg', '-oa b/c.svg', '-Tpng', "-oit's.png"]
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="uses a shell script")
+def test_render_failure_removes_old_outputs(tmpdir, monkeypatch):
+    _fake_dot(tmpdir, monkeypatch, 'exit 1\n')
+    svg, png = tmpdir.join('ab.svg'), tmpdir.join('ab.png')
+    svg.write('<svg>old</svg>')
+    png.write('old')
+    with pytest.raises(RuntimeError):
+        render('digraph G {}', [('svg', str(svg)), ('png', str(png))])
+    assert not svg.exists()
+    assert not png.exists()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="uses cat")
+def test_render_pool():
+    with RenderPool(2) as pool:
+        futures = [pool.submit(pipe, ['cat'], str(i).encode()) for i in range(5)]
+        assert pool.wait() == futures
+        assert pool.pending == []
+    assert [f.result() for f in futures] == [b'0', b'1', b'2', b'3', b'4']
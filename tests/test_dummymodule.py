@@ -0,0 +1,59 @@
+import os
+import sys
+
+from pydeps.dummymodule import DummyModule
+from pydeps.target import Target
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+def test_dummy_module_in_memory():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py
+    """
+    with create_files(files) as workdir:
+        target = Target('foo')
+        dummy = DummyModule(target)
+        assert sorted(os.listdir('.')) == ['foo']
+        assert dummy.text() == dummy.source
+        assert 'from foo import a' in dummy.source
+        assert 'from foo import b' in dummy.source
+        assert simpledeps('foo') == {'foo.b -> foo.a'}
+        assert simpledeps('foo', '--jobs 2') == {'foo.b -> foo.a'}
+
+
+def test_dummy_module_for_file():
+    files = """
+        a.py: |
+            import b
+        b.py: ""
+    """
+    with create_files(files) as workdir:
+        target = Target('a.py')
+        dummy = DummyModule(target)
+        assert dummy.source is None
+        assert dummy.pathname == os.path.join(workdir, 'a.py')
+        assert dummy.text() == 'import b\n'
+
+
+def test_no_chdir():
+    # pydeps doesn't change the current directory (or sys.path), so several
+    # targets can be analyzed at the same time.
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                import b
+        b.py: ""
+    """
+    with create_files(files) as workdir:
+        path = sys.path[:]
+        os.chdir('foo')
+        assert simpledeps(os.path.join(workdir, 'foo')) == {'b -> foo.a'}
+        assert simpledeps('a.py') == {'b -> a.py'}
+        assert os.getcwd() == os.path.join(workdir, 'foo')
+        assert sys.path == path
@@ -55,3 +55,11 @@ def test_load_module_short_circuits_excluded_name():
     mf = MyModuleFinder([], excludes=['foo.*'])
     with pytest.raises(ImportError, match='excluded'):
         mf.load_module('foo.bar', None, 'nonexistent', ('', '', 0))
+
+
+def test_excluder_many_patterns():
+    ex = Excluder(['vendor%d.*' % i for i in range(500)] + ['f?o'])
+    assert ex('vendor499.x') is True
+    assert ex('vendor500.x') is False
+    assert ex('fao') is True
+    assert 'vendor500.x' in ex._included
@@ -0,0 +1,83 @@
+import pytest
+
+from pydeps.extractors import EXTRACTORS
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+SOURCE = '''\
+"""import docstring"""
+import os, os.path as osp
+import a.b.c
+from . import x
+from ..pkg.sub import (
+    y as yy,   # comment with import z
+    w,
+)
+from .mod import *
+s = "from nowhere import nothing"
+t = """
+import neither
+"""
+x = 1; import semicolon
+if True: import inline
+
+
+def f():
+    import inside_function
+
+
+class C:
+    from q import r
+'''
+
+
+def _imports(extractor, source):
+    return [t for t in EXTRACTORS[extractor](source, 'test.py') if t[0] != 'store']
+
+
+@pytest.mark.parametrize('extractor', ['ast', 'tokenize'])
+def test_extractor_matches_bytecode(extractor):
+    assert _imports(extractor, SOURCE) == _imports('bytecode', SOURCE)
+    assert _imports(extractor, SOURCE.encode('utf-8')) == _imports('bytecode', SOURCE)
+
+
+def test_extractor_events():
+    assert _imports('tokenize', SOURCE)[:6] == [
+        ('absolute_import', (None, 'os')),
+        ('absolute_import', (None, 'os.path')),
+        ('absolute_import', (None, 'a.b.c')),
+        ('relative_import', (1, ('x',), '')),
+        ('relative_import', (2, ('y', 'w'), 'pkg.sub')),
+        ('relative_import', (1, ('*',), 'mod')),
+    ]
+
+
+def test_ast_skips_dead_code():
+    source = 'if 0:\n    import dead\nelse:\n    import alive\n'
+    assert _imports('ast', source) == _imports('bytecode', source)
+    assert _imports('ast', source) == [('absolute_import', (None, 'alive'))]
+
+
+@pytest.mark.parametrize('extractor', ['bytecode', 'ast', 'tokenize'])
+def test_extractor_syntax_error(extractor):
+    with pytest.raises(SyntaxError):
+        EXTRACTORS[extractor](b'# coding: no-such-encoding\nimport a\n', 'test.py')
+
+
+def test_extractor_option():
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+                from .c import C
+            - b.py: |
+                import relimp.c as c
+            - c.py: |
+                C = 1
+    """
+    with create_files(files) as workdir:
+        expected = simpledeps('relimp')
+        assert simpledeps('relimp', '--extractor ast') == expected
+        assert simpledeps('relimp', '--extractor tokenize') == expected
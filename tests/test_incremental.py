@@ -0,0 +1,70 @@
+import os
+
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+FILES = """
+    relimp:
+        - __init__.py
+        - a.py: |
+            from . import b
+        - b.py: |
+            from . import c
+        - c.py
+        - d.py
+"""
+
+
+def test_incremental_update(tmpdir, compiled):
+    state = str(tmpdir.join('state.json'))
+    with create_files(FILES) as workdir:
+        first = simpledeps('relimp', '--deps-state ' + state)
+        assert os.path.exists(state)
+        assert 'relimp.c -> relimp.b' in first
+
+        with open(os.path.join('relimp', 'b.py'), 'w') as fp:
+            fp.write('from . import d\n')
+
+        del compiled[:]
+        incremental = simpledeps('relimp', '--deps-state %s --changed relimp/b.py' % state)
+        names = [os.path.basename(p) for p in compiled]
+        assert 'b.py' in names
+        assert 'a.py' not in names
+
+        assert incremental == simpledeps('relimp')
+        assert 'relimp.d -> relimp.b' in incremental
+        assert 'relimp.c -> relimp.b' not in incremental
+
+
+def test_incremental_nothing_changed(tmpdir, compiled):
+    state = str(tmpdir.join('state.json'))
+    with create_files(FILES) as workdir:
+        first = simpledeps('relimp', '--deps-state ' + state)
+        del compiled[:]
+        assert simpledeps('relimp', '--deps-state %s --changed README.rst' % state) == first
+        assert not [p for p in compiled if not os.path.basename(p).startswith('_dummy_')]
+
+
+def test_incremental_new_file_needs_full_run(tmpdir):
+    state = str(tmpdir.join('state.json'))
+    with create_files(FILES) as workdir:
+        simpledeps('relimp', '--deps-state ' + state)
+        with open(os.path.join('relimp', 'e.py'), 'w') as fp:
+            fp.write('from . import a\n')
+        with open(os.path.join('relimp', 'c.py'), 'w') as fp:
+            fp.write('from . import e\n')
+        incremental = simpledeps('relimp', '--deps-state %s --changed relimp/c.py relimp/e.py' % state)
+        assert incremental == simpledeps('relimp')
+        assert 'relimp.e -> relimp.c' in incremental
+
+
+def test_incremental_syntax_error(tmpdir):
+    state = str(tmpdir.join('state.json'))
+    with create_files(FILES) as workdir:
+        simpledeps('relimp', '--deps-state ' + state)
+        with open(os.path.join('relimp', 'b.py'), 'w') as fp:
+            fp.write('def (:\n')
+        incremental = simpledeps('relimp', '--deps-state %s --changed relimp/b.py' % state)
+        assert incremental == simpledeps('relimp')
+        assert 'relimp.c -> relimp.b' not in incremental
@@ -0,0 +1,66 @@
+import os
+
+from pydeps.py2depgraph import MyModuleFinder, py2dep
+from pydeps.target import Target
+from pydeps.timings import Timings
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf, empty
+
+
+FILES = """
+    relimp:
+        - __init__.py: |
+            from .sub import d
+        - a.py: |
+            import keyword
+            from . import b
+        - b.py: |
+            from .sub import *
+            def f():
+                from relimp import c
+        - c.py: |
+            import relimp.sub.d
+        - sub:
+            - __init__.py
+            - d.py: |
+                from .. import a
+"""
+
+
+def test_jobs_same_output():
+    with create_files(FILES) as workdir:
+        serial = depgrf('relimp')
+        parallel = depgrf('relimp', '--jobs 2')
+        assert repr(serial) == repr(parallel)
+        assert 'relimp.c' in parallel.sources
+
+
+def test_jobs_prefetch(compiled):
+    with create_files(FILES) as workdir:
+        depgrf('relimp', '--jobs 2')
+        # all files were scanned by the worker processes
+        assert not [p for p in compiled if 'relimp' in p.split(os.sep)]
+
+
+def test_jobs_default():
+    assert MyModuleFinder([]).jobs == 1
+    assert MyModuleFinder([], jobs=None).jobs == 1
+    assert MyModuleFinder([], jobs=3).jobs == 3
+    assert MyModuleFinder([], jobs=0).jobs == (os.cpu_count() or 1)
+
+
+def test_jobs_compiled_count():
+    # files the workers fail to scan are only counted when they are compiled
+    files = FILES + """
+    main.py: |
+        import relimp, broken
+    broken.py: |
+        def (:
+    """
+    with create_files(files) as workdir:
+        counts = []
+        for jobs in (1, 2):
+            timings = Timings()
+            py2dep(Target('main.py'), **empty('--jobs %d' % jobs, timings=timings))
+            counts.append(timings.counters['files compiled'])
+        assert counts[0] == counts[1]
@@ -1,3 +1,4 @@
+import io
 import json
 import os
 from pydeps import pydeps
@@ -21,3 +22,45 @@ def test_dep2dot():
         assert g.sources['foo.a'] == g.sources['foo.a']
         assert str(g.sources['foo.a']).startswith('foo.a')
         assert 'foo.b' in repr(g.sources['foo.a'])
+
+
+def test_write_json_formats():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf("foo")
+        expected = json.dumps(dict(g.sources), indent=4, sort_keys=True,
+                              default=lambda obj: obj.__json__())
+        assert g.__json__() == expected
+
+        fp = io.StringIO()
+        g.write_json(fp, 'compact')
+        assert '\n' not in fp.getvalue() and ' ' not in fp.getvalue()
+        assert json.loads(fp.getvalue()) == json.loads(expected)
+
+        fp = io.StringIO()
+        g.write_json(fp, 'jsonl')
+        records = [json.loads(line) for line in fp.getvalue().splitlines()]
+        assert {r['name']: r for r in records} == json.loads(expected)
+
+
+def test_deps_output_jsonl():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py
+    """
+    with create_files(files) as workdir:
+        fname = os.path.join(workdir, 'deps.jsonl')
+        pydeps.call_pydeps('foo', show_deps=True, deps_out=fname, deps_format='jsonl',
+                           no_output=True, no_config=True)
+        with open(fname) as fp:
+            names = [json.loads(line)['name'] for line in fp]
+        assert 'foo.a' in names and 'foo.b' in names
@@ -1,5 +1,5 @@
 
-from pydeps.depgraph import Graph, GraphNode
+from pydeps.depgraph import Graph, GraphNode, adjacency_arrays, strongly_connected_components
 
 
 class Source:
@@ -35,3 +35,20 @@ def test_kosaraju():
         {nodes[8]},
         {nodes[9]}
     ]
+
+
+def test_strongly_connected_components():
+    edges = [(0, 1), (1, 2), (2, 0), (2, 8), (8, 9), (1, 3), (3, 4), (4, 5), (5, 6), (6, 3), (5, 7)]
+    scc = strongly_connected_components(*adjacency_arrays(10, edges))
+    assert sorted(sorted(c) for c in scc) == [[0, 1, 2], [3, 4, 5, 6], [7], [8], [9]]
+    # reverse topological order
+    assert scc.index([9]) < scc.index([8]) < [sorted(c) for c in scc].index([0, 1, 2])
+
+
+def test_strongly_connected_components_deep():
+    # a single cycle much deeper than the recursion limit
+    n = 100000
+    edges = [(i, (i + 1) % n) for i in range(n)]
+    scc = strongly_connected_components(*adjacency_arrays(n, edges))
+    assert len(scc) == 1
+    assert len(scc[0]) == n
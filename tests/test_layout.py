@@ -0,0 +1,83 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from pydeps.layout import builtin_renderer
+from pydeps.pydeps import _pydeps
+from pydeps.target import Target
+from tests.filemaker import create_files
+from tests.simpledeps import empty
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+FILES = """
+    foo:
+        - __init__.py
+        - a.py: |
+            from . import b
+        - b.py: |
+            from . import c
+        - c.py
+        - d.py: |
+            from . import a, b
+"""
+
+
+def run_pydeps(item, args="", **kw):
+    trgt = Target(item)
+    _pydeps(trgt, **empty(args, **kw))
+
+
+def read_svg(fname):
+    root = ET.parse(fname).getroot()
+    nodes = {}
+    for g in root.iter(SVG + 'g'):
+        if g.get('class') == 'node':
+            rect = g.find(SVG + 'rect')
+            nodes[g.get('data-name')] = (float(rect.get('x')), float(rect.get('y')))
+    edges = {(g.get('data-from'), g.get('data-to')) for g in root.iter(SVG + 'g') if g.get('class') == 'edge'}
+    return nodes, edges
+
+
+def test_builtin_renderer():
+    assert not builtin_renderer('svg')
+    assert builtin_renderer('svg', 'builtin')
+    assert builtin_renderer('html')
+    assert builtin_renderer('svg,html')
+    with pytest.raises(RuntimeError):
+        builtin_renderer('png', 'builtin')
+    with pytest.raises(RuntimeError):
+        builtin_renderer('png,html')
+
+
+def test_builtin_svg():
+    with create_files(FILES) as workdir:
+        output = os.path.join(workdir, 'foo.svg')
+        run_pydeps('foo', '--renderer builtin --no-show', output=output)
+        nodes, edges = read_svg(output)
+        assert {'foo.a', 'foo.b', 'foo.c', 'foo.d'} <= set(nodes)
+        # b imports c, so (like dot) the arrow points from c to b
+        assert ('foo.c', 'foo.b') in edges
+        assert ('foo.b', 'foo.a') in edges
+        # ..and the imported modules are above the modules importing them
+        assert nodes['foo.c'][1] < nodes['foo.b'][1] < nodes['foo.a'][1] < nodes['foo.d'][1]
+
+
+def test_builtin_reverse():
+    with create_files(FILES) as workdir:
+        output = os.path.join(workdir, 'foo.svg')
+        run_pydeps('foo', '--renderer builtin --reverse --no-show', output=output)
+        nodes, edges = read_svg(output)
+        assert ('foo.b', 'foo.c') in edges
+        assert nodes['foo.c'][1] < nodes['foo.b'][1]
+
+
+def test_html():
+    with create_files(FILES) as workdir:
+        output = os.path.join(workdir, 'foo.html')
+        run_pydeps('foo', '-T html --no-show', output=output)
+        with open(output) as fp:
+            page = fp.read()
+        assert page.startswith('<!DOCTYPE html>')
+        assert 'data-name="foo.a"' in page
@@ -0,0 +1,45 @@
+import logging
+
+from pydeps import lazylog
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+
+def test_lazy_is_only_evaluated_when_formatted(caplog):
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return 'result'
+
+    log = logging.getLogger('pydeps.test_lazylog')
+    with caplog.at_level(logging.WARNING, logger='pydeps.test_lazylog'):
+        log.info("value: %s", lazylog.lazy(expensive))
+    assert calls == []
+
+    with caplog.at_level(logging.INFO, logger='pydeps.test_lazylog'):
+        log.info("value: %s", lazylog.lazy(expensive))
+    assert calls == [1]
+    assert 'value: result' in caplog.text
+
+
+def test_json_dump():
+    assert str(lazylog.json_dump({'a': {'b': None}})) == '{\n    "a": {\n        "b": null\n    }\n}'
+
+
+def test_py2dep_doesnt_serialize_the_graph(monkeypatch, caplog):
+    def fail(obj):
+        raise AssertionError("the graph was serialized")
+
+    monkeypatch.setattr(lazylog, '_json_dump', fail)
+    monkeypatch.setattr(lazylog, '_yaml_dump', fail)
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py
+    """
+    with create_files(files) as workdir:
+        with caplog.at_level(logging.WARNING, logger='pydeps'):
+            assert 'foo.a' in depgrf('foo').sources
@@ -0,0 +1,53 @@
+from pydeps.matcher import PatternMatcher
+
+
+def test_pattern_matcher_empty():
+    m = PatternMatcher()
+    assert m('foo') is False
+
+
+def test_pattern_matcher_patterns():
+    m = PatternMatcher(['foo.*', 'bar', 'b?z'])
+    assert m('foo.a') is True
+    assert m('foo') is False
+    assert m('bar') is True
+    assert m('bar.a') is False
+    assert m('baz') is True
+
+
+def test_pattern_matcher_add():
+    m = PatternMatcher(['foo.*'])
+    assert m('bar') is False
+    m.add('bar')
+    assert m('bar') is True
+    # names are not patterns
+    m.add('x[y]')
+    assert m('x[y]') is True
+    assert m('xy') is False
+
+
+def test_pattern_matcher_many_names():
+    m = PatternMatcher(names=['mod%d' % i for i in range(10000)])
+    for i in range(10000):
+        m.add('pkg%d' % i)
+    assert m('mod9999') and m('pkg0')
+    assert not m('mod10000')
+
+
+def test_pattern_matcher_prefix_trie():
+    m = PatternMatcher(['foo.bar.*', 'vendor%d.*' % 7])
+    assert m.prefixes and m._regex is None
+    assert m('foo.bar.baz') is True
+    assert m('foo.bar.') is True
+    assert m('foo.bar') is False
+    assert m('foo.barbaz.x') is False
+    assert m('vendor7.x') is True
+    assert m('vendor77.x') is False
+
+
+def test_pattern_matcher_caches_negative_results():
+    m = PatternMatcher(['foo.*'])
+    assert m('bar') is False
+    assert 'bar' in m._included
+    m.add('bar')
+    assert m('bar') is True
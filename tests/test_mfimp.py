@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from pydeps import mfimp
+from pydeps.py2depgraph import RawDependencies
+from tests.filemaker import create_files
+
+
+FILES = """
+    pkg:
+        - __init__.py
+        - a.py
+    nspkg:
+        - b.py
+"""
+
+
+@pytest.fixture
+def path_cache():
+    mfimp.path_cache.reset()
+    yield mfimp.path_cache
+    mfimp.path_cache.reset()
+
+
+def test_locate_module(path_cache):
+    with create_files(FILES) as workdir:
+        path = [workdir]
+        assert mfimp.locate_module('pkg', path) == (os.path.join(workdir, 'pkg'), ('', '', mfimp.PKG_DIRECTORY))
+        assert mfimp.locate_module('nspkg', path)[1][2] == mfimp.NAMESPACE_PACKAGE
+        fname, (suffix, _mode, kind) = mfimp.locate_module('a', [os.path.join(workdir, 'pkg')])
+        assert (fname, suffix, kind) == (os.path.join(workdir, 'pkg', 'a.py'), '.py', mfimp.PY_SOURCE)
+        with pytest.raises(ImportError):
+            mfimp.locate_module('missing', path)
+
+
+def test_locate_module_cached(path_cache, monkeypatch):
+    with create_files(FILES) as workdir:
+        path = [workdir]
+        with pytest.raises(ImportError):
+            mfimp.locate_module('missing', path)
+        mfimp.locate_module('pkg', path)
+
+        # the answers don't come from the file system any more
+        scanned = []
+        scandir = os.scandir
+        monkeypatch.setattr(os, 'scandir', lambda d: scanned.append(d) or scandir(d))
+        with pytest.raises(ImportError):
+            mfimp.locate_module('missing', path)
+        assert mfimp.locate_module('pkg', path)[1][2] == mfimp.PKG_DIRECTORY
+        assert mfimp.locate_module('a', [os.path.join(workdir, 'pkg')])
+        assert path_cache.hits == 2
+        assert scanned == []  # pkg was listed when looking for __init__.py
+
+
+def test_locate_module_volatile(path_cache):
+    with create_files(FILES) as workdir:
+        path = [workdir]
+        with pytest.raises(ImportError):
+            mfimp.locate_module('c', path)
+        with open(os.path.join(workdir, 'c.py'), 'w') as fp:
+            fp.write('')
+        with pytest.raises(ImportError):
+            mfimp.locate_module('c', path)  # cached
+
+        path_cache.reset(volatile=[workdir])
+        with pytest.raises(ImportError):
+            mfimp.locate_module('d', path)
+        with open(os.path.join(workdir, 'd.py'), 'w') as fp:
+            fp.write('')
+        assert mfimp.locate_module('d', path)[0] == os.path.join(workdir, 'd.py')
+
+
+def test_module_finders_have_their_own_cache(monkeypatch):
+    files = """
+        main.py: |
+            import helper
+    """
+    with create_files(files) as workdir:
+        monkeypatch.syspath_prepend(workdir)
+        assert 'helper' not in RawDependencies('main.py').depgraph['__main__']
+        with open('helper.py', 'w') as fp:
+            fp.write('import json\n')
+        # a new module finder sees the new file
+        assert 'helper' in RawDependencies('main.py').depgraph['__main__']
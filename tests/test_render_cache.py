@@ -0,0 +1,40 @@
+from pydeps.cache import RenderCache
+from pydeps.pydeps import render
+
+SRC = """
+digraph G {
+    a -> b
+}
+"""
+
+
+def test_render_cache_key(tmpdir):
+    cache = RenderCache(str(tmpdir.join('cache')), graphviz_version='dot - graphviz version 2.43.0')
+    assert cache.get_rendered(SRC, 'svg') is None
+    cache.put_rendered(SRC, 'svg', b'<svg/>')
+    assert cache.get_rendered(SRC, 'svg') == b'<svg/>'
+    assert cache.get_rendered(SRC.encode('utf-8'), 'svg') == b'<svg/>'
+    assert cache.get_rendered(SRC, 'png') is None
+    assert cache.get_rendered(SRC + ' ', 'svg') is None
+
+    other = RenderCache(str(tmpdir.join('cache')), graphviz_version='dot - graphviz version 9.0.0')
+    assert other.get_rendered(SRC, 'svg') is None
+
+
+def test_render_from_cache(tmpdir):
+    # cached graphs are written without calling dot
+    cache = RenderCache(str(tmpdir.join('cache')), graphviz_version='x')
+    cache.put_rendered(SRC, 'svg', b'<svg><title>G</title></svg>')
+    cache.put_rendered(SRC, 'png', b'PNG')
+
+    output = str(tmpdir.join('ab.svg'))
+    render(SRC, [('svg', output)], cache=cache)
+    assert tmpdir.join('ab.svg').read_binary().startswith(b'<svg><title>G</title><style>')
+
+    render(SRC, [('svg', output), ('png', str(tmpdir.join('ab.png')))], cache=cache)
+    assert tmpdir.join('ab.png').read_binary() == b'PNG'
+    assert cache.hits == 3
+
+
+def test_tests_use_their_own_cache_dir(cache_home):
+    assert RenderCache(graphviz_version='x').directory.startswith(str(cache_home))
@@ -1,4 +1,10 @@
-from pydeps.render_context import RenderContext, Rankdir
+import os
+
+import pydeps
+from pydeps.render_context import RenderBuffer, RenderContext, Rankdir
+from pydeps.target import Target
+
+PYDEPS = os.path.dirname(pydeps.__file__)
 
 
 def test_render_context():
@@ -26,3 +32,35 @@ def test_render_context_rankdir():
         pass
     text = ctx.text()
     assert 'rankdir = LR' in text
+
+
+def test_render_buffer_nodecolor():
+    buf = RenderBuffer(Target(PYDEPS), cluster=True, max_cluster_size=10)
+    with buf.graph():
+        buf.write_node('pydeps.a', fillcolor='#111111')
+        buf.write_node('foo.b', fillcolor='#222222')
+        buf.write_rule('foo.b', 'pydeps.a')
+    buf.triage_clusters()
+    # the target's nodes aren't clustered
+    assert buf._nodecolor('pydeps.a') == '#111111'
+    # clustered nodes (and unknown nodes) are black
+    assert buf._nodecolor('foo.b') == '#000000'
+    assert buf._nodecolor('bar') == '#000000'
+
+
+def test_render_buffer_collapse_clusters():
+    buf = RenderBuffer(Target(PYDEPS), cluster=True, max_cluster_size=1)
+    with buf.graph():
+        for n in ('pydeps.a', 'foo.a', 'foo.b', 'bar.a', 'bar.b'):
+            buf.write_node(n, fillcolor='#111111')
+        buf.write_rule('foo.a', 'pydeps.a', minlen=1)
+        buf.write_rule('foo.b', 'pydeps.a', minlen=2)
+        buf.write_rule('foo.a', 'bar.a', minlen=3)
+        buf.write_rule('foo.b', 'bar.b', minlen=4)
+    buf.triage_clusters()
+    assert not buf.clusters
+    assert buf.rules == {
+        ('foo', 'pydeps.a'): {'minlen': 2},
+        ('foo', 'bar'): {'minlen': 4},
+    }
+    assert buf.node_attrs['foo']['shape'] == 'folder'
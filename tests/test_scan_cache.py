@@ -0,0 +1,69 @@
+import os
+
+from pydeps.cache import ScanCache
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+def test_scan_cache_roundtrip(tmpdir):
+    src = tmpdir.join('a.py')
+    src.write('import b\n')
+    cache = ScanCache(str(tmpdir.join('cache')))
+    assert cache.get_imports(str(src)) is None
+    imports = [('absolute_import', (None, 'b'))]
+    cache.put_imports(str(src), imports)
+    assert cache.get_imports(str(src)) == imports
+    assert cache.hits == 1
+
+
+def test_scan_cache_invalidated_by_change(tmpdir):
+    src = tmpdir.join('a.py')
+    src.write('import b\n')
+    cache = ScanCache(str(tmpdir.join('cache')))
+    cache.put_imports(str(src), [('absolute_import', (None, 'b'))])
+    src.write('import b, c\n')
+    assert cache.get_imports(str(src)) is None
+
+
+def test_scan_cache_prune(tmpdir):
+    cache = ScanCache(str(tmpdir.join('cache')), max_size=100)
+    for i in range(10):
+        cache.put('key%d' % i, b'x' * 40)
+    assert cache.size() == 400
+    cache.prune()
+    assert cache.size() <= 100
+
+
+def test_cache_hit_without_touching(tmpdir, monkeypatch):
+    # a cache that can be read but not written (e.g. read-only) still hits
+    cache = ScanCache(str(tmpdir.join('cache')))
+    cache.put('key', b'data')
+
+    def utime(*args):
+        raise PermissionError(13, 'Permission denied')
+
+    monkeypatch.setattr(os, 'utime', utime)
+    assert cache.get('key') == b'data'
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_scan_cache_skips_compile(tmpdir, compiled):
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py
+    """
+    cache_dir = str(tmpdir.join('cache'))
+    args = '--scan-cache --cache-dir ' + cache_dir
+    with create_files(files) as workdir:
+        first = simpledeps('relimp', args)
+        assert os.listdir(cache_dir)
+
+        # the dummy module is re-created every time, so it will be compiled
+        del compiled[:]
+        second = simpledeps('relimp', args)
+        assert first == second
+        assert compiled
+        assert not [p for p in compiled if 'relimp' in p.split(os.sep)]
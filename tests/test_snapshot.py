@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from pydeps.snapshot import read_snapshot, write_snapshot
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+FILES = """
+    foo:
+        - __init__.py
+        - a.py: |
+            from . import b
+        - b.py: |
+            from . import c
+            import missingmodule
+        - c.py
+"""
+
+
+def test_snapshot_roundtrip(tmpdir):
+    fname = str(tmpdir.join('graph.snap'))
+    depgraph = {
+        '__main__': {'foo.a': '/x/foo/a.py', 'foo': None},
+        'foo.a': {'foo.b': '/x/foo/b.py', u'føø': '/x/føø.py'},
+        'foo.b': {},
+    }
+    types = {'foo.a': 1, 'foo.b': 1, 'foo': 5}
+    badmodules = {'missing': {'foo.a': 1, 'foo.b': 1}}
+    write_snapshot(fname, depgraph, types, badmodules, {'dummyname': '_dummy_foo.py'})
+    snap = read_snapshot(fname)
+    assert snap.depgraph == depgraph
+    assert list(snap.depgraph) == list(depgraph)
+    assert snap.types == types
+    assert snap.badmodules == badmodules
+    assert snap.meta == {'dummyname': '_dummy_foo.py'}
+
+
+def test_not_a_snapshot(tmpdir):
+    fname = str(tmpdir.join('graph.snap'))
+    for data in [b'', b'hello world' * 10]:
+        with open(fname, 'wb') as fp:
+            fp.write(data)
+        with pytest.raises(RuntimeError):
+            read_snapshot(fname)
+
+    write_snapshot(fname, {'a': {'b': None}}, {}, {}, {})
+    with open(fname, 'rb') as fp:
+        data = fp.read()
+    with open(fname, 'wb') as fp:
+        fp.write(data[:-16])
+    with pytest.raises(RuntimeError):
+        read_snapshot(fname)
+
+
+def test_from_snapshot():
+    with create_files(FILES) as workdir:
+        fname = os.path.join(workdir, 'foo.snap')
+        expected = simpledeps('foo', '--save-snapshot %s' % fname)
+        assert 'foo.b -> foo.a' in expected
+        only = simpledeps('foo', '--only foo.b foo.c')
+
+        # the snapshot is used instead of the files
+        os.remove(os.path.join(workdir, 'foo', 'c.py'))
+        assert simpledeps('foo', '--from-snapshot %s' % fname) == expected
+        assert simpledeps('foo', '--from-snapshot %s --only foo.b foo.c' % fname) == only
+
+        missing = simpledeps('foo', '--from-snapshot %s --include-missing' % fname)
+        assert 'missingmodule -> foo.b' in missing
+
+
+def test_snapshot_of_other_target():
+    files = FILES + """
+    bar:
+        - __init__.py
+    """
+    with create_files(files) as workdir:
+        fname = os.path.join(workdir, 'foo.snap')
+        simpledeps('foo', '--save-snapshot %s' % fname)
+        with pytest.raises(RuntimeError) as e:
+            simpledeps('bar', '--from-snapshot %s' % fname)
+        assert 'is a snapshot of' in str(e.value)
@@ -0,0 +1,69 @@
+import json
+import os
+
+from pydeps.pydeps import _pydeps
+from pydeps.target import Target
+from pydeps.timings import Timings
+from tests.filemaker import create_files
+from tests.simpledeps import empty
+
+
+def run_pydeps(item, args="", **kw):
+    trgt = Target(item)
+    _pydeps(trgt, **empty(args, **kw))
+
+
+FILES = """
+    foo:
+        - __init__.py
+        - a.py: |
+            from . import b
+        - b.py: |
+            import foo.c
+        - c.py
+"""
+
+
+def test_timings_stage_and_count():
+    t = Timings()
+    with t.stage('a'):
+        pass
+    with t.stage('a'):
+        pass
+    t.count('n')
+    t.count('n', 2)
+    assert list(t.stages) == ['a']
+    assert t.stages['a']['wall'] >= 0
+    assert t.counters == {'n': 3}
+    data = json.loads(t.__json__())
+    assert set(data) == {'stages', 'total', 'counters'}
+    report = t.report()
+    assert report.splitlines()[0].split() == ['stage', 'wall', 'cpu']
+    assert 'total' in report
+
+
+def test_pydeps_timings_hook():
+    with create_files(FILES) as workdir:
+        t = Timings()
+        run_pydeps('foo', '--no-output -x bar?', timings=t)
+        for stage in ('dummymodule', 'find_modules', 'raw_depgraph', 'depgraph', 'filter', 'dep2dot'):
+            assert stage in t.stages
+        assert t.counters['modules loaded'] >= 4
+        assert t.counters['files compiled'] >= 4
+        assert t.counters['edges created'] >= 2
+        assert t.counters['stat calls'] > 0
+        assert t.counters['regexes evaluated'] > 0
+        assert 'bytes piped to dot' not in t.counters   # --no-output
+
+
+def test_timings_output(capsys):
+    with create_files(FILES) as workdir:
+        fname = os.path.join(workdir, 'timings.json')
+        run_pydeps('foo', '--no-output --timings --timings-output %s' % fname)
+        with open(fname) as fp:
+            data = json.load(fp)
+        assert 'find_modules' in data['stages']
+        assert data['counters']['modules loaded'] >= 4
+
+        run_pydeps('foo', '--no-output --timings')
+        assert 'find_modules' in capsys.readouterr().err